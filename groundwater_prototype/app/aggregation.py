@@ -0,0 +1,276 @@
+# aggregation.py
+from __future__ import annotations
+import os, threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+from station_levels import parse_date
+from districts import DATA_DIR, nearest_district
+
+# ---------------------------
+# Config
+# ---------------------------
+
+FREQS = ("daily", "monthly", "seasonal")
+
+# How a metric rolls up from daily to coarser buckets:
+#   "mean" → mean of all observations in the bucket
+#   "sum"  → sum of the daily (cross-gauge mean) values, i.e. rainfall totals
+METRICS = {"water_level": "mean", "rainfall": "sum", "temperature": "mean"}
+
+# Indian hydrological seasons. December counts toward the following year's winter.
+SEASON_OF_MONTH = {
+    1: "winter", 2: "winter", 12: "winter",
+    3: "pre_monsoon", 4: "pre_monsoon", 5: "pre_monsoon",
+    6: "monsoon", 7: "monsoon", 8: "monsoon", 9: "monsoon",
+    10: "post_monsoon", 11: "post_monsoon",
+}
+SEASON_ORDER = ("winter", "pre_monsoon", "monsoon", "post_monsoon")
+
+# Field names seen in India-WRIS / data.gov.in records
+TIME_FIELDS = ("dataTime", "date", "Date", "datetime", "timestamp", "observation_date")
+VALUE_FIELDS = ("dataValue", "value", "Value", "level", "water_level", "rainfall", "temperature")
+STATION_FIELDS = ("stationCode", "station_code", "stationName", "station", "station_id")
+
+# ---------------------------
+# Utilities
+# ---------------------------
+
+def bucket_key(ts: datetime, freq: str) -> str:
+    if freq == "daily":
+        return ts.strftime("%Y-%m-%d")
+    if freq == "monthly":
+        return ts.strftime("%Y-%m")
+    if freq == "seasonal":
+        year = ts.year + 1 if ts.month == 12 else ts.year
+        return f"{year}-{SEASON_OF_MONTH[ts.month]}"
+    raise ValueError(f"Unknown freq {freq!r}; expected one of {FREQS}")
+
+def _sort_key(key: str) -> Tuple:
+    # Seasonal keys sort by hydrological order inside a year; the rest sort lexically
+    year, _, rest = key.partition("-")
+    if rest in SEASON_ORDER:
+        return (year, SEASON_ORDER.index(rest))
+    return (year, rest)
+
+def _pick(rec: Dict[str, Any], names: Iterable[str]):
+    for n in names:
+        v = rec.get(n)
+        if v not in (None, ""):
+            return v
+    return None
+
+def district_key(state: str, district: str) -> str:
+    return f"{(state or '').strip()}|{(district or '').strip()}"
+
+class _Acc:
+    """Running count / sum / min / max for one bucket."""
+    __slots__ = ("n", "total", "lo", "hi")
+
+    def __init__(self):
+        self.n, self.total, self.lo, self.hi = 0, 0.0, float("inf"), float("-inf")
+
+    def add(self, v: float, dn: int = 1):
+        self.n += dn
+        self.total += v
+        self.lo = min(self.lo, v)
+        self.hi = max(self.hi, v)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.n if self.n else None
+
+# ---------------------------
+# Engine
+# ---------------------------
+
+class AggregationEngine:
+    """
+    Incremental per-district resampler for water level, rainfall and temperature.
+    Every observation updates its daily, monthly and seasonal bucket in O(1);
+    reads only walk bucket summaries, never the raw history.
+    """
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str, str], Dict[str, _Acc]] = {}
+        self._watermark: Dict[Tuple[str, str, str], datetime] = {}
+        self._pending: Dict[Tuple[str, str, str], set] = {}   # points past the watermark from partial pulls
+        self._lock = threading.Lock()
+
+    def _acc(self, district: str, metric: str, freq: str, key: str) -> _Acc:
+        table = self._buckets.setdefault((district, metric, freq), {})
+        acc = table.get(key)
+        if acc is None:
+            acc = table[key] = _Acc()
+        return acc
+
+    def _add(self, district: str, metric: str, ts: datetime, value: float):
+        daily = self._acc(district, metric, "daily", bucket_key(ts, "daily"))
+        before = daily.mean
+        daily.add(value)
+        for freq in ("monthly", "seasonal"):
+            acc = self._acc(district, metric, freq, bucket_key(ts, freq))
+            if METRICS[metric] == "mean":
+                acc.add(value)
+            elif before is None:
+                acc.add(daily.mean)
+            else:
+                # Replace this day's previous contribution with the new daily mean
+                acc.total += daily.mean - before
+                acc.lo, acc.hi = min(acc.lo, daily.mean), max(acc.hi, daily.mean)
+
+    def add_many(self, district: str, metric: str, points: Iterable[Tuple[Any, ...]], source: str = "",
+                 complete: bool = True) -> int:
+        """
+        Add (timestamp, value) or (timestamp, value, station) points. Points at or before the
+        last one seen for this district/metric/source are skipped, so re-pulling a full history
+        only adds what is new.
+        With complete=False (a partial pull that may have skipped older points) the watermark
+        stays put; the points are remembered by (station, timestamp) so the next full pull does
+        not add them twice. Without a station, the value stands in for it.
+        Returns the number of points added.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {tuple(METRICS)}")
+        parsed = []
+        for ts, v, *station in points:
+            ts = ts if isinstance(ts, datetime) else parse_date(ts)
+            try:
+                v = float(v)
+            except (TypeError, ValueError):
+                continue
+            if ts is not None:
+                ident = station[0] if station and station[0] is not None else v
+                parsed.append((ts, v, ident))
+        parsed.sort(key=lambda p: p[0])
+        wm_key = (district, metric, source)
+        added = 0
+        with self._lock:
+            wm = self._watermark.get(wm_key)
+            pending = self._pending.setdefault(wm_key, set())
+            for ts, v, ident in parsed:
+                if (wm is not None and ts <= wm) or (ident, ts) in pending:
+                    continue
+                self._add(district, metric, ts, v)
+                added += 1
+                if not complete:
+                    pending.add((ident, ts))
+            if complete and parsed and (wm is None or parsed[-1][0] > wm):
+                wm = self._watermark[wm_key] = parsed[-1][0]
+                pending.difference_update([p for p in pending if p[1] <= wm])
+        return added
+
+    def add_records(self, district: str, metric: str, records: Iterable[Dict[str, Any]], source: str = "",
+                    complete: bool = True) -> int:
+        """Add raw upstream records (India-WRIS style dicts)."""
+        return self.add_many(district, metric,
+                             ((_pick(r, TIME_FIELDS), _pick(r, VALUE_FIELDS), _pick(r, STATION_FIELDS))
+                              for r in records), source, complete)
+
+    # ---- reads ----
+
+    def districts(self) -> List[str]:
+        with self._lock:
+            return sorted({d for d, _, _ in self._buckets})
+
+    def _value(self, metric: str, acc: _Acc) -> Optional[float]:
+        # Daily buckets always report the cross-gauge mean
+        return acc.total if METRICS[metric] == "sum" else acc.mean
+
+    def series(self, district: str, freq: str = "monthly", metrics: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """All metrics joined on one bucket index (missing metric → None)."""
+        if freq not in FREQS:
+            raise ValueError(f"Unknown freq {freq!r}; expected one of {FREQS}")
+        metrics = metrics or list(METRICS)
+        with self._lock:
+            tables = {m: self._buckets.get((district, m, freq), {}) for m in metrics}
+            keys = sorted(set().union(*tables.values()), key=_sort_key)
+            rows = []
+            for k in keys:
+                row: Dict[str, Any] = {"period": k}
+                for m, t in tables.items():
+                    acc = t.get(k)
+                    if acc is None:
+                        row[m] = None
+                    elif freq == "daily":
+                        row[m] = round(acc.mean, 3)
+                    else:
+                        row[m] = round(self._value(m, acc), 3)
+                rows.append(row)
+        return rows
+
+    def latest(self, district: str, metric: str = "water_level") -> Optional[Dict[str, Any]]:
+        """Most recent daily value of a metric, or None if the district has none."""
+        with self._lock:
+            daily = self._buckets.get((district, metric, "daily"))
+            if not daily:
+                return None
+            day = max(daily)
+            return {"date": day, "value": round(daily[day].mean, 3)}
+
+    def rolling(self, district: str, metric: str, freq: str = "monthly", window: int = 12) -> Dict[str, Any]:
+        """Stats over the last `window` buckets of one metric."""
+        rows = [r for r in self.series(district, freq, [metric]) if r[metric] is not None][-window:]
+        if not rows:
+            return {"metric": metric, "freq": freq, "window": window, "n": 0}
+        vals = [r[metric] for r in rows]
+        mean = sum(vals) / len(vals)
+        return {
+            "metric": metric, "freq": freq, "window": window, "n": len(vals),
+            "from": rows[0]["period"], "to": rows[-1]["period"],
+            "mean": round(mean, 3), "min": min(vals), "max": max(vals),
+            "std": round((sum((v - mean) ** 2 for v in vals) / len(vals)) ** 0.5, 3),
+            "change": round(vals[-1] - vals[0], 3),
+        }
+
+    def monsoon(self, district: str) -> List[Dict[str, Any]]:
+        """
+        Per year: pre- vs post-monsoon mean water level (m below ground), the rise
+        over the monsoon, monsoon rainfall, and recharge ratio = rise / rainfall (both in m).
+        """
+        with self._lock:
+            lvl = self._buckets.get((district, "water_level", "seasonal"), {})
+            rain = self._buckets.get((district, "rainfall", "seasonal"), {})
+            years = sorted({k.split("-", 1)[0] for k in list(lvl) + list(rain)})
+            out = []
+            for y in years:
+                pre, post = lvl.get(f"{y}-pre_monsoon"), lvl.get(f"{y}-post_monsoon")
+                wet = rain.get(f"{y}-monsoon")
+                row = {"year": y,
+                       "pre_monsoon_level_m": round(pre.mean, 3) if pre else None,
+                       "post_monsoon_level_m": round(post.mean, 3) if post else None,
+                       "monsoon_rainfall_mm": round(wet.total, 1) if wet else None,
+                       "level_rise_m": None, "recharge_ratio": None}
+                if pre and post:
+                    row["level_rise_m"] = round(pre.mean - post.mean, 3)
+                    if wet and wet.total > 0:
+                        row["recharge_ratio"] = round(row["level_rise_m"] / (wet.total / 1000.0), 4)
+                out.append(row)
+        return out
+
+# ---------------------------
+# Local data
+# ---------------------------
+
+def load_readings_csv(engine: AggregationEngine,
+                      readings_path: str = os.path.join(DATA_DIR, "readings.csv"),
+                      stations_path: str = os.path.join(DATA_DIR, "stations.csv")) -> int:
+    """
+    Feed readings.csv into the engine, splitting its water_level_m / rainfall_mm columns
+    into separate metrics. Stations are placed in the district with the nearest centroid.
+    """
+    import pandas as pd
+    readings = pd.read_csv(readings_path)
+    stations = pd.read_csv(stations_path).set_index("station_id")
+    added = 0
+    for sid, grp in readings.groupby("station_id"):
+        if sid not in stations.index:
+            continue
+        st = stations.loc[sid]
+        place = nearest_district(float(st["lat"]), float(st["lon"]))
+        if place is None:
+            continue
+        dkey = district_key(*place)
+        ts = grp["timestamp"].tolist()
+        added += engine.add_many(dkey, "water_level", zip(ts, grp["water_level_m"]), source=f"readings.csv:{sid}")
+        added += engine.add_many(dkey, "rainfall", zip(ts, grp["rainfall_mm"]), source=f"readings.csv:{sid}")
+    return added
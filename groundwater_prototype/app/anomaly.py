@@ -0,0 +1,211 @@
+# anomaly.py
+from __future__ import annotations
+import math, threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------
+# Config
+# ---------------------------
+
+MIN_N = 5                   # readings before statistical checks kick in
+Z_THRESH = 4.0              # |x - running mean| / running std
+EWMA_ALPHA = 0.2
+EWMA_K = 4.0                # |x - ewma| / ew std
+RATE_M_PER_DAY = 3.0        # |Δ level| per day treated as a sudden drawdown / rise
+FLATLINE_N = 12             # identical consecutive readings → stuck sensor
+VALID_RANGE = (-50.0, 1000.0)   # metres below ground a sensor can plausibly report
+MAX_ALERTS = 1000
+
+# ---------------------------
+# Online state
+# ---------------------------
+
+class StationState:
+    """O(1) per-station state: Welford mean/variance, EWMA mean/variance, last reading, flat run."""
+    __slots__ = ("n", "mean", "m2", "ewma", "ewvar", "last_ts", "last", "run")
+
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+        self.ewma, self.ewvar = None, 0.0
+        self.last_ts, self.last, self.run = None, None, 0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"n": self.n, "mean": round(self.mean, 4), "std": round(self.std, 4),
+                "ewma": None if self.ewma is None else round(self.ewma, 4),
+                "ew_std": round(math.sqrt(self.ewvar), 4), "last_ts": self.last_ts, "last": self.last}
+
+def _alert(station: str, ts: float, value: float, kind: str, detail: str) -> Dict[str, Any]:
+    return {"station_id": station, "timestamp": ts, "value": value, "kind": kind, "detail": detail}
+
+def check(st: StationState, station: str, ts: float, x: float) -> List[Dict[str, Any]]:
+    """Test one reading against the state *before* it, then fold it in."""
+    alerts = []
+    if x is None or math.isnan(x) or not (VALID_RANGE[0] <= x <= VALID_RANGE[1]):
+        return [_alert(station, ts, x, "sensor_fault", f"value outside {VALID_RANGE}")]
+
+    if st.n >= MIN_N:
+        sd = st.std
+        if sd > 0 and abs(x - st.mean) / sd > Z_THRESH:
+            alerts.append(_alert(station, ts, x, "outlier", f"z={(x - st.mean) / sd:.1f}"))
+        ew_sd = math.sqrt(st.ewvar)
+        if ew_sd > 0 and abs(x - st.ewma) / ew_sd > EWMA_K:
+            alerts.append(_alert(station, ts, x, "level_shift", f"ewma={st.ewma:.3f} dev={(x - st.ewma) / ew_sd:.1f}σ"))
+    if st.last is not None and ts > st.last_ts:
+        rate = (x - st.last) / ((ts - st.last_ts) / 86400.0)
+        if abs(rate) > RATE_M_PER_DAY:
+            # Levels are depth below ground: getting deeper fast is a drawdown
+            kind = "sudden_drawdown" if rate > 0 else "sudden_rise"
+            alerts.append(_alert(station, ts, x, kind, f"{rate:+.2f} m/day"))
+    run = st.run + 1 if st.last is not None and x == st.last else 1
+    if run == FLATLINE_N:
+        alerts.append(_alert(station, ts, x, "sensor_fault", f"{FLATLINE_N} identical readings"))
+
+    # Fold in: Welford, then EWMA / EW variance of the deviation from the previous EWMA
+    st.n += 1
+    d = x - st.mean
+    st.mean += d / st.n
+    st.m2 += d * (x - st.mean)
+    if st.ewma is None:
+        st.ewma = x
+    else:
+        dev = x - st.ewma
+        st.ewvar = (1 - EWMA_ALPHA) * st.ewvar + EWMA_ALPHA * dev * dev
+        st.ewma += EWMA_ALPHA * dev
+    st.last_ts, st.last, st.run = ts, x, run
+    return alerts
+
+# ---------------------------
+# Batch (vectorised backfill)
+# ---------------------------
+
+def detect_batch(station: str, ts: np.ndarray, x: np.ndarray) -> Tuple[List[Dict[str, Any]], StationState]:
+    """
+    Same checks as `check`, run over a whole (time-sorted) series with array ops.
+    Returns the alerts and the resulting online state so live detection can continue from it.
+    """
+    ts = np.asarray(ts, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    order = np.argsort(ts, kind="stable")
+    ts, x = ts[order], x[order]
+    # Like AnomalyDetector.update, skip readings not newer than the last valid one
+    valid_ts = np.where(np.isnan(x) | (x < VALID_RANGE[0]) | (x > VALID_RANGE[1]), -np.inf, ts)
+    prev_valid = np.concatenate([[-np.inf], np.maximum.accumulate(valid_ts)[:-1]])
+    keep = ts > prev_valid
+    ts, x = ts[keep], x[keep]
+    st = StationState()
+    alerts: List[Dict[str, Any]] = []
+
+    bad = np.isnan(x) | (x < VALID_RANGE[0]) | (x > VALID_RANGE[1])
+    for i in np.flatnonzero(bad):
+        alerts.append(_alert(station, float(ts[i]), float(x[i]), "sensor_fault", f"value outside {VALID_RANGE}"))
+    ts, x = ts[~bad], x[~bad]
+    n = x.shape[0]
+    if n == 0:
+        return alerts, st
+
+    # Running mean / sample std of everything before i
+    idx = np.arange(n)
+    csum, csq = np.cumsum(x), np.cumsum(x * x)
+    prev_n = idx
+    prev_mean = np.divide(csum - x, prev_n, out=np.zeros(n), where=prev_n > 0)
+    prev_var = np.divide((csq - x * x) - prev_n * prev_mean ** 2, prev_n - 1,
+                         out=np.zeros(n), where=prev_n > 1)
+    prev_sd = np.sqrt(np.clip(prev_var, 0, None))
+
+    # EWMA and EW variance as of the reading before i
+    ewma = pd.Series(x).ewm(alpha=EWMA_ALPHA, adjust=False).mean().to_numpy()
+    prev_ewma = np.concatenate([[x[0]], ewma[:-1]])
+    dev2 = (x - prev_ewma) ** 2
+    dev2[0] = 0.0
+    ewvar = pd.Series(dev2).ewm(alpha=EWMA_ALPHA, adjust=False).mean().to_numpy().copy()
+    ewvar[0] = 0.0
+    prev_ew_sd = np.sqrt(np.concatenate([[0.0], ewvar[:-1]]))
+
+    warm = prev_n >= MIN_N
+    z = np.divide(x - prev_mean, prev_sd, out=np.zeros(n), where=prev_sd > 0)
+    ewz = np.divide(x - prev_ewma, prev_ew_sd, out=np.zeros(n), where=prev_ew_sd > 0)
+    dt_days = np.diff(ts, prepend=np.nan) / 86400.0
+    rate = np.divide(np.diff(x, prepend=np.nan), dt_days, out=np.zeros(n), where=dt_days > 0)
+
+    same = np.concatenate([[False], x[1:] == x[:-1]])
+    run_id = np.cumsum(~same)
+    run_len = idx - np.searchsorted(run_id, run_id) + 1
+
+    for i in np.flatnonzero(warm & (np.abs(z) > Z_THRESH)):
+        alerts.append(_alert(station, float(ts[i]), float(x[i]), "outlier", f"z={z[i]:.1f}"))
+    for i in np.flatnonzero(warm & (np.abs(ewz) > EWMA_K)):
+        alerts.append(_alert(station, float(ts[i]), float(x[i]), "level_shift",
+                             f"ewma={prev_ewma[i]:.3f} dev={ewz[i]:.1f}σ"))
+    for i in np.flatnonzero(np.abs(rate) > RATE_M_PER_DAY):
+        alerts.append(_alert(station, float(ts[i]), float(x[i]),
+                             "sudden_drawdown" if rate[i] > 0 else "sudden_rise", f"{rate[i]:+.2f} m/day"))
+    for i in np.flatnonzero(run_len == FLATLINE_N):
+        alerts.append(_alert(station, float(ts[i]), float(x[i]), "sensor_fault", f"{FLATLINE_N} identical readings"))
+    alerts.sort(key=lambda a: a["timestamp"])
+
+    st.n = n
+    st.mean = float(csum[-1] / n)
+    st.m2 = float(max(csq[-1] - n * st.mean ** 2, 0.0))
+    st.ewma, st.ewvar = float(ewma[-1]), float(ewvar[-1])
+    st.last_ts, st.last, st.run = float(ts[-1]), float(x[-1]), int(run_len[-1])
+    return alerts, st
+
+# ---------------------------
+# Detector
+# ---------------------------
+
+class AnomalyDetector:
+    """Per-station online detector with a bounded log of recent alerts."""
+    def __init__(self, max_alerts: int = MAX_ALERTS):
+        self._states: Dict[str, StationState] = {}
+        self._alerts: deque = deque(maxlen=max_alerts)
+        self._lock = threading.Lock()
+
+    def update(self, station: str, ts: float, value: float) -> List[Dict[str, Any]]:
+        with self._lock:
+            st = self._states.get(station)
+            if st is None:
+                st = self._states[station] = StationState()
+            if st.last_ts is not None and ts <= st.last_ts:
+                return []   # late or duplicate reading; state only moves forward
+            alerts = check(st, station, ts, value)
+            self._alerts.extend(alerts)
+            return alerts
+
+    def update_many(self, rows: Iterable[Tuple[str, float, float]]) -> int:
+        """Feed (station, ts, water_level) rows; batches are sorted by time first. Returns alert count."""
+        return sum(len(self.update(s, t, v)) for s, t, v in sorted(rows, key=lambda r: r[1]))
+
+    def backfill(self, series: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> int:
+        """Re-run detection over full histories ({station: (ts, values)}) and reset live state from them."""
+        found = []
+        states = {}
+        for station, (ts, x) in series.items():
+            alerts, st = detect_batch(station, ts, x)
+            found.extend(alerts)
+            states[station] = st
+        found.sort(key=lambda a: a["timestamp"])
+        with self._lock:
+            self._states.update(states)
+            kept = [a for a in self._alerts if a["station_id"] not in states]
+            self._alerts.clear()
+            self._alerts.extend(sorted(kept + found, key=lambda a: a["timestamp"]))
+        return len(found)
+
+    def alerts(self, station: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            out = [a for a in self._alerts if station is None or a["station_id"] == station]
+        return out[::-1][:limit]
+
+    def state(self, station: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            st = self._states.get(station)
+            return st.to_dict() if st else None
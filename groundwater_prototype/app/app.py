@@ -3,7 +3,7 @@ from flask_cors import CORS
 from recommendation import groundwater_recommendation
 
 # Import endpoints
-from routes import stations, readings, forecast, recommend, faq
+from routes import stations, readings, forecast, recommend, faq, analytics, tiles, surface, export
 
 app = Flask(__name__)
 CORS(app)
@@ -14,6 +14,10 @@ app.register_blueprint(readings.bp)
 app.register_blueprint(forecast.bp)
 app.register_blueprint(recommend.bp)
 app.register_blueprint(faq.bp)
+app.register_blueprint(analytics.bp)
+app.register_blueprint(tiles.bp)
+app.register_blueprint(surface.bp)
+app.register_blueprint(export.bp)
 
 @app.route("/")
 def home():
@@ -0,0 +1,209 @@
+# datagov_ingest.py
+from __future__ import annotations
+import os, json, time, sqlite3, threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Iterator
+
+import requests
+
+from station_levels import parse_date
+
+try:
+    import ijson   # streaming JSON parser (optional; falls back to full-page json)
+except ImportError:
+    ijson = None
+
+# ---------------------------
+# Config
+# ---------------------------
+
+DATAGOV_ENDPOINT = "https://api.data.gov.in/resource/{resource_id}"
+PAGE_SIZE = int(os.getenv("DATAGOV_PAGE_SIZE", "1000"))
+MAX_WORKERS = int(os.getenv("DATAGOV_WORKERS", "4"))
+RATE_PER_SEC = float(os.getenv("DATAGOV_RATE_PER_SEC", "4"))   # requests/second across all workers
+RETRIES = 2
+STORE_PATH = os.getenv("DATAGOV_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "datagov_levels.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gwl_records (
+    resource_id TEXT NOT NULL,
+    station     TEXT NOT NULL,
+    date        TEXT NOT NULL DEFAULT '',
+    date_iso    TEXT,
+    value       TEXT NOT NULL,
+    raw         TEXT,
+    PRIMARY KEY (resource_id, station, date)
+)
+"""
+
+# ---------------------------
+# Utilities
+# ---------------------------
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+    def __init__(self, rate_per_sec: float):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def extract_reading(r: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Pick station/date/level out of a data.gov.in record; adapt names to your resource schema."""
+    site = r.get("station_id") or r.get("well_id") or r.get("site") or r.get("location")
+    dt = r.get("date") or r.get("observation_date") or r.get("datetime") or r.get("month_year")
+    lvl = r.get("depth_m") or r.get("depth_mbgl") or r.get("water_level") or r.get("gwl_value")
+    if not (site and lvl):
+        return None
+    return {"station": str(site), "date": dt, "value": lvl}
+
+def _iso(value: Any) -> Optional[str]:
+    dt = parse_date(value)
+    return dt.isoformat() if dt else None
+
+def open_store(path: str = STORE_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute(_SCHEMA)
+    # Stores created before date was NOT NULL: undated rows never matched the primary key
+    # (NULLs are distinct), so collapse their duplicates onto ''
+    conn.execute("DELETE FROM gwl_records WHERE date IS NULL AND rowid NOT IN "
+                 "(SELECT MAX(rowid) FROM gwl_records WHERE date IS NULL GROUP BY resource_id, station)")
+    conn.execute("DELETE FROM gwl_records WHERE date IS NULL AND EXISTS (SELECT 1 FROM gwl_records g "
+                 "WHERE g.resource_id = gwl_records.resource_id AND g.station = gwl_records.station AND g.date = '')")
+    conn.execute("UPDATE gwl_records SET date = '' WHERE date IS NULL")
+    conn.commit()
+    return conn
+
+# ---------------------------
+# Fetching
+# ---------------------------
+
+def _params(api_key: str, offset: int, limit: int) -> Dict[str, Any]:
+    return {"api-key": api_key, "format": "json", "limit": limit, "offset": offset}
+
+def fetch_total(api_key: str, resource_id: str, timeout: int = 20) -> int:
+    """Ask for a single record just to learn the dataset's total record count."""
+    url = DATAGOV_ENDPOINT.format(resource_id=resource_id)
+    r = requests.get(url, params=_params(api_key, 0, 1), timeout=timeout, headers={"User-Agent": "groundwater-faq/1.0"})
+    r.raise_for_status()
+    js = r.json()
+    return int(js.get("total") or js.get("count") or 0)
+
+def _iter_records(resp: requests.Response) -> Iterator[Dict[str, Any]]:
+    if ijson is not None:
+        resp.raw.decode_content = True
+        yield from ijson.items(resp.raw, "records.item")
+    else:
+        yield from resp.json().get("records", [])
+
+def fetch_page(api_key: str, resource_id: str, offset: int, limit: int,
+               limiter: Optional[RateLimiter] = None, timeout: int = 30) -> List[Dict[str, Any]]:
+    """
+    Fetch one offset page and return only the extracted readings, parsed incrementally
+    so the raw page body is never held in memory as a whole.
+    """
+    url = DATAGOV_ENDPOINT.format(resource_id=resource_id)
+    last_err: Optional[Exception] = None
+    for attempt in range(RETRIES + 1):
+        if limiter:
+            limiter.wait()
+        try:
+            with requests.get(url, params=_params(api_key, offset, limit), timeout=timeout, stream=True,
+                              headers={"User-Agent": "groundwater-faq/1.0"}) as resp:
+                resp.raise_for_status()
+                out = []
+                for rec in _iter_records(resp):
+                    reading = extract_reading(rec)
+                    if reading:
+                        reading["raw"] = json.dumps(rec, default=str)
+                        out.append(reading)
+                return out
+        except (requests.exceptions.RequestException, ValueError) as e:
+            last_err = e
+            time.sleep(0.5 * (attempt + 1))
+    raise last_err
+
+# ---------------------------
+# Ingestion
+# ---------------------------
+
+def ingest(api_key: str, resource_id: str, limit: Optional[int] = None,
+           conn: Optional[sqlite3.Connection] = None, page_size: int = PAGE_SIZE,
+           workers: int = MAX_WORKERS, rate_per_sec: float = RATE_PER_SEC) -> Dict[str, Any]:
+    """
+    Pull a whole data.gov.in resource into the local SQLite store.
+    Learns the total, fetches offset pages concurrently under a shared rate limit,
+    and writes each page as it completes. Pages are submitted through a window of
+    2 * workers, and dropped once written, so memory is bounded by workers * page_size.
+    """
+    own = conn is None
+    conn = conn or open_store()
+    started = time.time()
+    total = fetch_total(api_key, resource_id)
+    if limit is not None:
+        total = min(total, limit)
+    offsets = list(range(0, total, page_size))
+    limiter = RateLimiter(rate_per_sec)
+    written, failed = 0, []
+
+    workers = max(1, workers)
+    pending = iter(offsets)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futs: Dict[Any, int] = {}
+
+        def submit_next():
+            off = next(pending, None)
+            if off is not None:
+                futs[pool.submit(fetch_page, api_key, resource_id, off, min(page_size, total - off), limiter)] = off
+
+        # At most 2 * workers pages in flight or waiting to be written
+        for _ in range(2 * workers):
+            submit_next()
+        while futs:
+            done, _ = wait(futs, return_when=FIRST_COMPLETED)
+            for fut in done:
+                off = futs.pop(fut)
+                try:
+                    rows = fut.result()
+                except Exception:
+                    failed.append(off)
+                    submit_next()
+                    continue
+                conn.executemany(
+                    "INSERT OR REPLACE INTO gwl_records (resource_id, station, date, date_iso, value, raw) VALUES (?,?,?,?,?,?)",
+                    [(resource_id, r["station"], r["date"] or "", _iso(r["date"]), str(r["value"]), r["raw"])
+                     for r in rows])
+                conn.commit()
+                written += len(rows)
+                del rows
+                submit_next()
+
+    if own:
+        conn.close()
+    return {"resource_id": resource_id, "total": total, "pages": len(offsets), "written": written,
+            "failed_offsets": sorted(failed), "seconds": round(time.time() - started, 2)}
+
+def latest_per_station(resource_id: str, conn: Optional[sqlite3.Connection] = None) -> List[Dict[str, Any]]:
+    """Latest stored reading for each station of a resource."""
+    own = conn is None
+    conn = conn or open_store()
+    cur = conn.execute(
+        "SELECT station, date, value, MAX(COALESCE(date_iso, '')) FROM gwl_records "
+        "WHERE resource_id = ? GROUP BY station", (resource_id,))
+    rows = [{"station": s, "date": d, "value": v} for s, d, v, _ in cur]
+    if own:
+        conn.close()
+    return rows
+
+if __name__ == "__main__":
+    # Offline bulk pull: DATA_GOV_IN_API_KEY=... DATAGOV_GWL_RESOURCE_ID=... python datagov_ingest.py
+    stats = ingest(os.getenv("DATA_GOV_IN_API_KEY", ""), os.getenv("DATAGOV_GWL_RESOURCE_ID", ""))
+    print(json.dumps(stats, indent=2))
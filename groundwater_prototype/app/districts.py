@@ -0,0 +1,40 @@
+# districts.py
+from __future__ import annotations
+import os, json
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CENTROIDS_PATH = os.path.join(DATA_DIR, "indian_states_cities_with_latlon_completed.json")
+
+_CACHE = None
+
+def load_centroids() -> Tuple[List[Tuple[str, str]], np.ndarray]:
+    """
+    District centroids from the geocoded state → district list.
+    Returns ([(state, district), ...], float array of shape (n, 2) as lat, lon).
+    Districts that failed geocoding are skipped.
+    """
+    global _CACHE
+    if _CACHE is None:
+        with open(CENTROIDS_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        names, coords = [], []
+        for state, districts in data.items():
+            for d in districts:
+                if d.get("lat") is None or d.get("lon") is None:
+                    continue
+                names.append((state, d["name"]))
+                coords.append((d["lat"], d["lon"]))
+        _CACHE = (names, np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+    return _CACHE
+
+def nearest_district(lat: float, lon: float) -> Optional[Tuple[str, str]]:
+    """(state, district) whose centroid is closest to the point (equirectangular distance)."""
+    names, coords = load_centroids()
+    if not names:
+        return None
+    dlat = coords[:, 0] - lat
+    dlon = (coords[:, 1] - lon) * np.cos(np.radians(lat))
+    return names[int(np.argmin(dlat * dlat + dlon * dlon))]
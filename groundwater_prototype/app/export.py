@@ -0,0 +1,252 @@
+# export.py
+from __future__ import annotations
+import io, csv, os, sqlite3
+from typing import List, Dict, Any, Optional, Iterator
+
+import numpy as np
+import pandas as pd
+
+from districts import DATA_DIR, nearest_district
+from aggregation import district_key
+
+try:
+    import pyarrow as pa            # optional; Parquet / Arrow IPC need it, CSV does not
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# ---------------------------
+# Config
+# ---------------------------
+
+BATCH_ROWS = 65536
+FORMATS = ("csv", "arrow", "parquet")
+MIMETYPES = {
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Column order per dataset; projection (?columns=) picks from these
+SCHEMAS = {
+    "readings": ["station_id", "district", "timestamp", "water_level", "pressure", "temperature", "rainfall"],
+    "groundwater_levels": ["resource_id", "station", "date", "timestamp", "value"],
+    "water_level": ["district", "timestamp", "value"],
+    "rainfall": ["district", "timestamp", "value"],
+    "temperature": ["district", "timestamp", "value"],
+}
+
+Batch = Dict[str, np.ndarray]
+
+# ---------------------------
+# Filters
+# ---------------------------
+
+class Filters:
+    """Date range (inclusive, YYYY-MM-DD or epoch seconds), district ("State|District" or name) and station."""
+    def __init__(self, start: Optional[str] = None, end: Optional[str] = None,
+                 district: Optional[str] = None, station: Optional[str] = None):
+        self.start = None if not start else pd.Timestamp(float(start), unit="s") if start.replace(".", "").isdigit() else pd.Timestamp(start)
+        self.end = None if not end else pd.Timestamp(float(end), unit="s") if end.replace(".", "").isdigit() else pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(milliseconds=1)
+        self.district = (district or "").strip().lower() or None
+        self.station = (station or "").strip() or None
+
+    def district_ok(self, key: Optional[str]) -> bool:
+        if self.district is None:
+            return True
+        if not key:
+            return False
+        key = key.lower()
+        return key == self.district or key.split("|", 1)[-1] == self.district
+
+    def time_mask(self, ts: np.ndarray) -> np.ndarray:
+        mask = np.ones(ts.shape[0], dtype=bool)
+        if self.start is not None:
+            mask &= ts >= self.start.to_datetime64()
+        if self.end is not None:
+            mask &= ts <= self.end.to_datetime64()
+        return mask
+
+def _apply(batch: Batch, mask: np.ndarray) -> Batch:
+    return batch if mask.all() else {k: v[mask] for k, v in batch.items()}
+
+def _chunks(batch: Batch) -> Iterator[Batch]:
+    n = len(next(iter(batch.values())))
+    for s in range(0, n, BATCH_ROWS):
+        yield {k: v[s:s + BATCH_ROWS] for k, v in batch.items()}
+
+# ---------------------------
+# Sources (each yields column batches)
+# ---------------------------
+
+def readings_batches(f: Filters) -> Iterator[Batch]:
+    """readings.csv plus ingested telemetry, one batch per station (chunked)."""
+    stations = pd.read_csv(os.path.join(DATA_DIR, "stations.csv"))
+    place = {str(r.station_id): district_key(*nearest_district(r.lat, r.lon)) for r in stations.itertuples()}
+    path = os.path.join(DATA_DIR, "readings.csv")
+    if os.path.exists(path):
+        df = pd.read_csv(path, parse_dates=["timestamp"])
+        for sid, g in df.groupby(df["station_id"].astype(str)):
+            if (f.station and sid != f.station) or not f.district_ok(place.get(sid)):
+                continue
+            n = len(g)
+            batch = {
+                "station_id": np.full(n, sid, dtype=object),
+                "district": np.full(n, place.get(sid), dtype=object),
+                "timestamp": g["timestamp"].to_numpy(dtype="datetime64[ms]"),
+                "water_level": g["water_level_m"].to_numpy(np.float64),
+                "pressure": np.full(n, np.nan),
+                "temperature": np.full(n, np.nan),
+                "rainfall": g["rainfall_mm"].to_numpy(np.float64),
+            }
+            yield from _chunks(_apply(batch, f.time_mask(batch["timestamp"])))
+    try:
+        from telemetry import get_store
+        store = get_store()
+    except Exception:
+        return
+    for sid in store.stations():
+        if (f.station and sid != f.station) or not f.district_ok(place.get(sid)):
+            continue
+        cols = store.read(sid, f.start.timestamp() if f.start is not None else None,
+                          f.end.timestamp() if f.end is not None else None)
+        n = cols["timestamp"].shape[0]
+        if not n:
+            continue
+        yield from _chunks({
+            "station_id": np.full(n, sid, dtype=object),
+            "district": np.full(n, place.get(sid), dtype=object),
+            "timestamp": (cols["timestamp"] * 1000).astype("datetime64[ms]"),
+            "water_level": cols["water_level"],
+            "pressure": cols["pressure"],
+            "temperature": cols["temperature"],
+            "rainfall": np.full(n, np.nan),
+        })
+
+def groundwater_levels_batches(f: Filters, db_path: Optional[str] = None) -> Iterator[Batch]:
+    """data.gov.in readings from the local ingest store, read with fetchmany."""
+    from datagov_ingest import STORE_PATH
+    db_path = db_path or STORE_PATH
+    if not os.path.exists(db_path):
+        return
+    sql = "SELECT resource_id, station, date, date_iso, value FROM gwl_records WHERE 1=1"
+    args: List[Any] = []
+    if f.station:
+        sql += " AND station = ?"
+        args.append(f.station)
+    if f.start is not None:
+        sql += " AND date_iso >= ?"
+        args.append(f.start.isoformat())
+    if f.end is not None:
+        sql += " AND date_iso <= ?"
+        args.append(f.end.isoformat())
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.execute(sql, args)
+        while True:
+            rows = cur.fetchmany(BATCH_ROWS)
+            if not rows:
+                break
+            res, st, dt, iso, val = zip(*rows)
+            yield {
+                "resource_id": np.array(res, dtype=object),
+                "station": np.array(st, dtype=object),
+                "date": np.array(dt, dtype=object),
+                "timestamp": pd.to_datetime(pd.Series(iso), errors="coerce").to_numpy(dtype="datetime64[ms]"),
+                "value": pd.to_numeric(pd.Series(val), errors="coerce").to_numpy(np.float64),
+            }
+    finally:
+        conn.close()
+
+def district_series_batches(engine, metric: str, f: Filters) -> Iterator[Batch]:
+    """Daily district series of one metric from the aggregation engine."""
+    for key in engine.districts():
+        if not f.district_ok(key):
+            continue
+        rows = [r for r in engine.series(key, "daily", [metric]) if r[metric] is not None]
+        if not rows:
+            continue
+        ts = np.array([r["period"] for r in rows], dtype="datetime64[ms]")
+        batch = {"district": np.full(len(rows), key, dtype=object), "timestamp": ts,
+                 "value": np.array([r[metric] for r in rows], dtype=np.float64)}
+        yield from _chunks(_apply(batch, f.time_mask(ts)))
+
+# ---------------------------
+# Writers (each yields bytes)
+# ---------------------------
+
+def _project(batch: Batch, columns: List[str]) -> Batch:
+    return {c: batch[c] for c in columns}
+
+def _to_arrow(batch: Batch):
+    arrays = []
+    for v in batch.values():
+        if v.dtype == object:
+            arrays.append(pa.array(v, type=pa.string()))
+        else:
+            # Numeric / timestamp columns wrap the numpy buffer without copying; NaN stays NaN
+            arrays.append(pa.array(v))
+    return pa.RecordBatch.from_arrays(arrays, names=list(batch))
+
+class _Drain(io.RawIOBase):
+    """Write target that hands accumulated bytes back to a streaming response."""
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.parts.append(bytes(b))
+        return len(b)
+
+    def take(self) -> bytes:
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+def write_csv(batches: Iterator[Batch], columns: List[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(columns)
+    yield buf.getvalue().encode()
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate()
+        cols = []
+        for c in columns:
+            v = batch[c]
+            if np.issubdtype(v.dtype, np.datetime64):
+                v = np.datetime_as_string(v, unit="s")
+            elif v.dtype.kind == "f":
+                v = np.where(np.isnan(v), "", v.astype(str))
+            cols.append(v)
+        w.writerows(zip(*cols))
+        yield buf.getvalue().encode()
+
+def write_arrow(batches: Iterator[Batch], columns: List[str]) -> Iterator[bytes]:
+    sink = _Drain()
+    writer = None
+    for batch in batches:
+        rb = _to_arrow(_project(batch, columns))
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, rb.schema)
+        writer.write_batch(rb)
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+        yield sink.take()
+
+def write_parquet(batches: Iterator[Batch], columns: List[str], path: str) -> int:
+    """Parquet needs a footer written after all row groups, so it goes to a file. Returns rows written."""
+    writer, rows = None, 0
+    try:
+        for batch in batches:
+            rb = _to_arrow(_project(batch, columns))
+            if writer is None:
+                writer = pq.ParquetWriter(path, rb.schema, compression="snappy")
+            writer.write_batch(rb)
+            rows += rb.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
@@ -0,0 +1,271 @@
+# interpolation.py
+from __future__ import annotations
+import os, threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from districts import DATA_DIR, load_centroids
+
+try:
+    from scipy.spatial import cKDTree   # optional; falls back to brute-force neighbour search
+except ImportError:
+    cKDTree = None
+
+# ---------------------------
+# Config
+# ---------------------------
+
+INDIA_BBOX = (68.0, 6.0, 97.5, 37.5)   # west, south, east, north (degrees)
+GRID_RES_DEG = 0.25
+K_NEIGHBOURS = 8
+IDW_POWER = 2.0
+KRIGING_CHUNK = 20000      # targets per batched kriging solve (bounds the (n, k, k, 3) temporaries)
+EARTH_RADIUS_KM = 6371.0
+CACHE_SURFACES = 16        # surfaces kept, keyed by (date, method, res, observation version)
+CACHE_LAYOUTS = 4          # neighbour layouts kept, keyed by (method, res)
+RES_RANGE = (0.05, 2.0)    # accepted grid resolutions (degrees)
+MAX_STATION_KM = float(os.getenv("SURFACE_MAX_STATION_KM", "150"))   # beyond this an estimate is low-confidence
+
+# ---------------------------
+# Geometry
+# ---------------------------
+
+def to_xyz(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Lat/lon (degrees) → points on the unit sphere, so Euclidean (chord) distance ranks like great-circle."""
+    la, lo = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(la) * np.cos(lo), np.cos(la) * np.sin(lo), np.sin(la)])
+
+def knn(points: np.ndarray, targets: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(distances in km, indices), each shaped (len(targets), k)."""
+    k = min(k, points.shape[0])
+    if cKDTree is not None:
+        d, i = cKDTree(points).query(targets, k=k)
+        d, i = d.reshape(len(targets), k), i.reshape(len(targets), k)
+    else:
+        d2 = ((targets[:, None, :] - points[None, :, :]) ** 2).sum(axis=2)
+        i = np.argpartition(d2, k - 1, axis=1)[:, :k] if k < points.shape[0] else np.tile(np.arange(k), (len(targets), 1))
+        d = np.sqrt(np.take_along_axis(d2, i, axis=1))
+    # chord → great-circle km
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(d / 2, 0, 1)), i
+
+def grid_axes(res: float = GRID_RES_DEG, bbox=INDIA_BBOX) -> Tuple[np.ndarray, np.ndarray]:
+    w, s, e, n = bbox
+    return np.arange(s + res / 2, n, res), np.arange(w + res / 2, e, res)
+
+# ---------------------------
+# Weights
+# ---------------------------
+
+def idw_weights(dist: np.ndarray, power: float = IDW_POWER) -> np.ndarray:
+    """Row-normalised inverse-distance weights; a target sitting on a station takes its value."""
+    exact = dist < 1e-6
+    w = 1.0 / np.maximum(dist, 1e-6) ** power
+    hit = exact.any(axis=1)
+    w[hit] = exact[hit].astype(np.float64)
+    return w / w.sum(axis=1, keepdims=True)
+
+def _exp_variogram(h: np.ndarray, sill: float, rng: float, nugget: float = 0.0) -> np.ndarray:
+    return nugget + sill * (1.0 - np.exp(-3.0 * h / rng))
+
+def kriging_weights(xyz: np.ndarray, idx: np.ndarray, dist: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Local ordinary kriging weights over each target's k neighbours, exponential variogram
+    with sill = variance of the observations and practical range = median neighbour spacing * 3.
+    Targets are solved as batched linear systems, KRIGING_CHUNK at a time.
+    """
+    n_t, k = idx.shape
+    if k < 2:
+        return np.ones((n_t, k))
+    sill = float(np.var(values)) or 1.0
+    rng = float(np.median(dist[:, -1])) * 3.0 or 1.0
+    w = np.empty((n_t, k))
+    for s in range(0, n_t, KRIGING_CHUNK):
+        ci, cd = idx[s:s + KRIGING_CHUNK], dist[s:s + KRIGING_CHUNK]
+        nb = xyz[ci]                                                  # (chunk, k, 3)
+        chord = np.linalg.norm(nb[:, :, None, :] - nb[:, None, :, :], axis=3)
+        h = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+        a = np.ones((len(ci), k + 1, k + 1))
+        a[:, :k, :k] = _exp_variogram(h, sill, rng)
+        a[:, k, k] = 0.0
+        b = np.ones((len(ci), k + 1))
+        b[:, :k] = _exp_variogram(cd, sill, rng)
+        try:
+            w[s:s + KRIGING_CHUNK] = np.linalg.solve(a, b[..., None])[..., 0][:, :k]
+        except np.linalg.LinAlgError:
+            w[s:s + KRIGING_CHUNK] = idw_weights(cd)
+    exact = dist < 1e-6
+    hit = exact.any(axis=1)
+    w[hit] = exact[hit].astype(np.float64)
+    return w
+
+# ---------------------------
+# Observations
+# ---------------------------
+
+_STATIONS_CSV = os.path.join(DATA_DIR, "stations.csv")
+_READINGS_CSV = os.path.join(DATA_DIR, "readings.csv")
+_csv_cache: Dict[str, Any] = {}
+
+def _mtime(path: str) -> Optional[float]:
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def _store():
+    try:
+        from telemetry import get_store
+        return get_store()
+    except Exception:
+        return None
+
+def observation_version() -> Tuple:
+    """Cheap fingerprint of everything station_observations reads: file mtimes and the telemetry version."""
+    store = _store()
+    return (_mtime(_STATIONS_CSV), _mtime(_READINGS_CSV), store.version if store is not None else None)
+
+def _csv_frames() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(stations, readings) from the CSVs, re-read only when their mtimes change."""
+    key = (_mtime(_STATIONS_CSV), _mtime(_READINGS_CSV))
+    if _csv_cache.get("key") != key:
+        stations = pd.read_csv(_STATIONS_CSV)
+        stations["station_id"] = stations["station_id"].astype(str)
+        if key[1] is not None:
+            r = pd.read_csv(_READINGS_CSV, parse_dates=["timestamp"])
+            readings = pd.DataFrame({"station_id": r["station_id"].astype(str),
+                                     "ts": r["timestamp"], "value": r["water_level_m"]}).dropna(subset=["value"])
+        else:
+            readings = pd.DataFrame(columns=["station_id", "ts", "value"])
+        _csv_cache.update(key=key, stations=stations, readings=readings)
+    return _csv_cache["stations"], _csv_cache["readings"]
+
+def station_observations(date: Optional[str] = None) -> Tuple[str, pd.DataFrame]:
+    """
+    Latest water level per station on or before `date` (YYYY-MM-DD; default: newest data),
+    from readings.csv and ingested telemetry, joined to stations.csv coordinates.
+    Without a date, telemetry comes from the store's latest-reading index; only a past
+    date needs each station's history.
+    Returns (observation date used, frame of station_id, lat, lon, value).
+    """
+    stations, readings = _csv_frames()
+    frames = [readings]
+    store = _store()
+    if store is not None:
+        if date:
+            until = (pd.Timestamp(date) + pd.Timedelta(days=1)).timestamp()
+            for sid in store.stations():
+                cols = store.read(sid, until=until)
+                frames.append(pd.DataFrame({"station_id": sid, "ts": pd.to_datetime(cols["timestamp"], unit="s"),
+                                            "value": cols["water_level"]}))
+        else:
+            latest = store.latest()
+            frames.append(pd.DataFrame({"station_id": list(latest),
+                                        "ts": pd.to_datetime([t for t, _ in latest.values()], unit="s"),
+                                        "value": [v for _, v in latest.values()]}))
+    frames = [f for f in frames if len(f)]
+    obs = pd.concat(frames, ignore_index=True).dropna(subset=["value"]) if frames else \
+        pd.DataFrame(columns=["station_id", "ts", "value"])
+    if date:
+        obs = obs[obs["ts"] < pd.Timestamp(date) + pd.Timedelta(days=1)]
+    used = obs["ts"].max().strftime("%Y-%m-%d") if len(obs) else (date or "")
+    latest = obs.sort_values("ts").groupby("station_id").tail(1)
+    out = latest.merge(stations[["station_id", "lat", "lon"]], on="station_id", how="inner")
+    return used, out[["station_id", "lat", "lon", "value"]].sort_values("station_id").reset_index(drop=True)
+
+# ---------------------------
+# Engine
+# ---------------------------
+
+class _Layout:
+    """Neighbour indices and weights for grid cells and district centroids, for one station geometry."""
+    def __init__(self, obs: pd.DataFrame, method: str, res: float):
+        self.method, self.res = method, res
+        self.key = tuple(zip(obs["station_id"], obs["lat"], obs["lon"]))
+        self.xyz = to_xyz(obs["lat"].to_numpy(float), obs["lon"].to_numpy(float))
+        lats, lons = grid_axes(res)
+        self.shape = (len(lats), len(lons))
+        glat, glon = np.meshgrid(lats, lons, indexing="ij")
+        names, cents = load_centroids()
+        self.districts = names
+        targets = np.vstack([to_xyz(glat.ravel(), glon.ravel()), to_xyz(cents[:, 0], cents[:, 1])])
+        self.dist, self.idx = knn(self.xyz, targets, K_NEIGHBOURS)
+        self.weights = self._weights(obs["value"].to_numpy(float))
+
+    def _weights(self, values: np.ndarray) -> np.ndarray:
+        if self.method == "kriging":
+            return kriging_weights(self.xyz, self.idx, self.dist, values)
+        return idw_weights(self.dist)
+
+class SurfaceEngine:
+    """
+    Water-level surfaces from station points: IDW over k nearest neighbours (or local
+    ordinary kriging), for a national grid and every district centroid in one vectorised pass.
+    Surfaces are cached per (date, observation version), so a cache hit reads no data;
+    when only some station values change, only targets that have one of those stations
+    among their neighbours are recomputed.
+    """
+    def __init__(self):
+        self._layouts: "OrderedDict[Tuple[str, float], _Layout]" = OrderedDict()
+        self._cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._last: Dict[Tuple[str, float], Tuple[np.ndarray, np.ndarray]] = {}   # (values, estimates)
+        self._lock = threading.Lock()
+
+    def surface(self, date: Optional[str] = None, method: str = "idw", res: float = GRID_RES_DEG) -> Dict[str, Any]:
+        if method not in ("idw", "kriging"):
+            raise ValueError("method must be 'idw' or 'kriging'")
+        if not (RES_RANGE[0] <= res <= RES_RANGE[1]):
+            raise ValueError(f"res must be between {RES_RANGE[0]} and {RES_RANGE[1]} degrees")
+        # Same date can still see late readings, so the observation version is part of the key
+        ck = (date, method, res, observation_version())
+        with self._lock:
+            if ck in self._cache:
+                self._cache.move_to_end(ck)
+                return self._cache[ck]
+        used, obs = station_observations(date)
+        if obs.empty:
+            raise ValueError("No station observations available")
+        values = obs["value"].to_numpy(float)
+        key = tuple(zip(obs["station_id"], obs["lat"], obs["lon"]))
+        with self._lock:
+            lk = (method, res)
+            layout = self._layouts.get(lk)
+            recomputed = "full"
+            if layout is None or layout.key != key:
+                layout = self._layouts[lk] = _Layout(obs, method, res)
+                self._last.pop(lk, None)
+                while len(self._layouts) > CACHE_LAYOUTS:
+                    old, _ = self._layouts.popitem(last=False)
+                    self._last.pop(old, None)
+                est = (layout.weights * values[layout.idx]).sum(axis=1)
+            else:
+                prev_values, est = self._last[lk]
+                est = est.copy()
+                changed = np.flatnonzero(prev_values != values)
+                if method == "kriging" and changed.size:
+                    # Kriging weights depend on the sill, so any value change re-weights every target
+                    layout.weights = layout._weights(values)
+                    est = (layout.weights * values[layout.idx]).sum(axis=1)
+                elif changed.size:
+                    rows = np.flatnonzero(np.isin(layout.idx, changed).any(axis=1))
+                    est[rows] = (layout.weights[rows] * values[layout.idx[rows]]).sum(axis=1)
+                    recomputed = f"{rows.size} of {est.size} targets"
+                else:
+                    recomputed = "none"
+            self._layouts.move_to_end(lk)
+            self._last[lk] = (values, est)
+
+            n_grid = layout.shape[0] * layout.shape[1]
+            lats, lons = grid_axes(res)
+            result = {
+                "date": used, "method": method, "res_deg": res, "stations": len(values),
+                "recomputed": recomputed,
+                "grid": {"lat": lats, "lon": lons, "values": est[:n_grid].reshape(layout.shape)},
+                "districts": {f"{s}|{d}": float(v) for (s, d), v in zip(layout.districts, est[n_grid:])},
+                "nearest_station_km": {f"{s}|{d}": float(v) for (s, d), v in zip(layout.districts, layout.dist[n_grid:, 0])},
+            }
+            self._cache[ck] = result
+            while len(self._cache) > CACHE_SURFACES:
+                self._cache.popitem(last=False)
+            return result
+
+engine = SurfaceEngine()
@@ -0,0 +1,77 @@
+from flask import Blueprint, jsonify, request
+
+from aggregation import AggregationEngine, FREQS, METRICS, district_key, load_readings_csv
+from routes import stations, rainfall, temperature
+import upstream
+
+bp = Blueprint("analytics", __name__, url_prefix="/api/analytics")
+
+# Shared engine; seeded from readings.csv on first use, topped up by /refresh
+engine = AggregationEngine()
+_seeded = False
+REFRESH_BUDGET_S = 60
+
+FETCHERS = {
+    "water_level": stations.fetch_groundwater_data,
+    "rainfall": rainfall.fetch_groundwater_data,
+    "temperature": temperature.fetch_groundwater_data,
+}
+
+def _engine():
+    global _seeded
+    if not _seeded:
+        _seeded = True
+        try:
+            load_readings_csv(engine)
+        except Exception as e:
+            print(f"Could not load readings.csv: {e}")
+    return engine
+
+@bp.route("/", methods=["GET"])
+def list_districts():
+    return jsonify({"districts": _engine().districts(), "freqs": FREQS, "metrics": list(METRICS)})
+
+@bp.route("/<state>/<district>", methods=["GET"])
+def district_analytics(state, district):
+    """
+    Aligned level / rainfall / temperature series for a district plus rolling stats.
+    ?freq=daily|monthly|seasonal (default monthly), ?window=N buckets (default 12)
+    """
+    freq = request.args.get("freq", "monthly")
+    if freq not in FREQS:
+        return jsonify({"error": f"freq must be one of {list(FREQS)}"}), 400
+    window = request.args.get("window", 12, type=int)
+    if window is None or window < 1:
+        return jsonify({"error": "window must be a positive integer"}), 400
+    key = district_key(state, district)
+    eng = _engine()
+    return jsonify({
+        "district": key,
+        "freq": freq,
+        "series": eng.series(key, freq),
+        "rolling": {m: eng.rolling(key, m, freq, window) for m in METRICS},
+        "monsoon": eng.monsoon(key),
+    })
+
+@bp.route("/<state>/<district>/refresh", methods=["POST"])
+def refresh_district(state, district):
+    """Pull all three India-WRIS datasets for the district; only records newer than the last pull are added."""
+    try:
+        budget = upstream.check_budget(request.args.get("budget", REFRESH_BUDGET_S, type=float))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    key = district_key(state, district)
+    eng = _engine()
+    deadline = upstream.Deadline(budget)
+    added, missing = {}, []
+    for metric, fetch in FETCHERS.items():
+        complete = True
+        try:
+            records = fetch(state, district, deadline=deadline)
+        except upstream.UpstreamError as e:
+            records, complete = e.partial, False
+            missing.append({"metric": metric, "reason": e.reason, "partial_records": len(e.partial)})
+        # Pages need not be oldest-first, so a partial pull must not move the watermark past what it skipped
+        added[metric] = eng.add_records(key, metric, records, source="india-wris", complete=complete)
+    return jsonify({"status": "partial" if missing else "ok", "district": key, "added": added,
+                    "missing": missing})
@@ -0,0 +1,76 @@
+from flask import Blueprint, jsonify, request, Response, send_file, stream_with_context
+import itertools
+import os
+import tempfile
+
+import export
+from export import Filters, SCHEMAS, FORMATS, MIMETYPES
+
+bp = Blueprint("export", __name__, url_prefix="/api/export")
+
+# Filter → columns it is applied to; a dataset without any of them cannot honour it
+FILTER_COLUMNS = {"district": ("district",), "station": ("station_id", "station")}
+
+def _batches(dataset, f):
+    if dataset == "readings":
+        return export.readings_batches(f)
+    if dataset == "groundwater_levels":
+        return export.groundwater_levels_batches(f)
+    from routes.analytics import _engine
+    return export.district_series_batches(_engine(), dataset, f)
+
+@bp.route("/", methods=["GET"])
+def list_datasets():
+    return jsonify({"datasets": SCHEMAS, "formats": list(FORMATS),
+                    "arrow_available": export.pa is not None})
+
+@bp.route("/<dataset>", methods=["GET"])
+def export_dataset(dataset):
+    """
+    Bulk export of one dataset.
+    ?format=csv|arrow|parquet (default csv), ?columns=a,b (projection),
+    ?start= / ?end= (YYYY-MM-DD or epoch seconds, inclusive), ?district=, ?station=
+    """
+    if dataset not in SCHEMAS:
+        return jsonify({"error": f"Unknown dataset {dataset}; expected one of {list(SCHEMAS)}"}), 404
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {list(FORMATS)}"}), 400
+    if fmt != "csv" and export.pa is None:
+        return jsonify({"error": "pyarrow not installed. Run pip install pyarrow, or use format=csv"}), 501
+    columns = [c for c in (request.args.get("columns") or "").split(",") if c] or SCHEMAS[dataset]
+    unknown = [c for c in columns if c not in SCHEMAS[dataset]]
+    if unknown:
+        return jsonify({"error": f"Unknown columns {unknown} for {dataset}"}), 400
+    unsupported = [k for k, cols in FILTER_COLUMNS.items()
+                   if request.args.get(k) and not any(c in SCHEMAS[dataset] for c in cols)]
+    if unsupported:
+        return jsonify({"error": f"{dataset} cannot be filtered by {unsupported}"}), 400
+    try:
+        f = Filters(request.args.get("start"), request.args.get("end"),
+                    request.args.get("district"), request.args.get("station"))
+    except ValueError as e:
+        return jsonify({"error": f"Bad date filter: {e}"}), 400
+
+    batches = _batches(dataset, f)
+    first = next(batches, None)
+    if first is None:
+        return Response(status=204)
+    batches = itertools.chain([first], batches)
+    filename = f"{dataset}.{ 'arrows' if fmt == 'arrow' else fmt }"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+
+    if fmt == "parquet":
+        fd, path = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        try:
+            rows = export.write_parquet(batches, columns, path)
+        except Exception:
+            os.remove(path)
+            raise
+        resp = send_file(path, mimetype=MIMETYPES[fmt], as_attachment=True, download_name=filename)
+        resp.headers["X-Export-Rows"] = str(rows)
+        resp.call_on_close(lambda: os.remove(path))
+        return resp
+    writer = export.write_csv if fmt == "csv" else export.write_arrow
+    return Response(stream_with_context(writer(batches, columns)), mimetype=MIMETYPES[fmt], headers=headers)
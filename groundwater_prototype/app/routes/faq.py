@@ -1,14 +1,17 @@
 # faq.py
 from __future__ import annotations
-import os, time, json, math
+import os, time, json, math, threading
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 
 import requests
 from bs4 import BeautifulSoup
-import numpy as np
 from flask import Blueprint, jsonify, request
 
+from vector_index import make_index
+from station_levels import LevelTable, answer_level_question
+import datagov_ingest
+
 bp = Blueprint("faq", __name__, url_prefix="/api/faq")
 
 # ---------------------------
@@ -19,7 +22,7 @@ bp = Blueprint("faq", __name__, url_prefix="/api/faq")
 USGS_QA_HUB = "https://www.usgs.gov/water-science-school/science/groundwater-questions-answers"
 CGWB_FAQ_URL = "https://cgwb.gov.in/en/faq"   # Fallback: https://www.cgwb.gov.in/en/faq-general
 
-# Optional API sources (numeric → templated Q&A)
+# Optional API sources (numeric → station level table)
 USGS_GWLEVELS_API_DOCS = "https://waterservices.usgs.gov/docs/groundwater-levels/"
 USGS_GWLEVELS_ENDPOINT = "https://waterservices.usgs.gov/nwis/gwlevels/"
 
@@ -27,19 +30,28 @@ USGS_GWLEVELS_ENDPOINT = "https://waterservices.usgs.gov/nwis/gwlevels/"
 # To use this, find a resourceId for a groundwater-level dataset and paste below.
 DATAGOV_API_KEY = os.getenv("DATA_GOV_IN_API_KEY", "")
 DATAGOV_RESOURCE_ID = os.getenv("DATAGOV_GWL_RESOURCE_ID", "")  # e.g., from Atal Bhujal Yojana dataset
-DATAGOV_ENDPOINT = "https://api.data.gov.in/resource/{resource_id}"
+DATAGOV_ENDPOINT = datagov_ingest.DATAGOV_ENDPOINT
 
 # Embedding model (lazy-loaded)
 _MODEL = None
 
+# Vector index: "exact" (brute force) or "ivf" (approximate); storage "float32" | "int8"
+# ("float16" halves memory but scores ~6x slower than float32; see vector_index.DTYPES)
+FAQ_INDEX_BACKEND = os.getenv("FAQ_INDEX_BACKEND", "exact")
+FAQ_INDEX_DTYPE = os.getenv("FAQ_INDEX_DTYPE", "float32")
+FAQ_INDEX_NPROBE = int(os.getenv("FAQ_INDEX_NPROBE", "8"))
+
 # In-memory store
 _FAQ: List[Dict[str, Any]] = []
-_EMB: Optional[np.ndarray] = None
+_INDEX = None
+_LEVELS = LevelTable()   # station → latest reading; answered by lookup, not embedded
+_META_INGEST: Dict[str, Any] = {"status": "idle"}   # state / stats of the background data.gov.in ingest
+_INGEST_LOCK = threading.Lock()
 _META = {
     "last_refresh_epoch": None,
     "source_counts": {},
     "using_datagov": bool(DATAGOV_API_KEY and DATAGOV_RESOURCE_ID),
-    "usgs_numeric_examples": 0
+    "stations": 0
 }
 
 # ---------------------------
@@ -153,12 +165,13 @@ def fetch_cgwb_faqs() -> List[Dict[str, Any]]:
     return items
 
 # ---------------------------
-# Numeric → templated Q/A
+# Numeric → station readings
 # ---------------------------
 
 def fetch_usgs_latest_levels(site_ids: List[str]) -> List[Dict[str, Any]]:
     """
-    Pull recent USGS manual groundwater levels for given site numbers and template into Q/A.
+    Pull recent USGS manual groundwater levels for given site numbers.
+    Returns one {station, value, date, unit, source} reading per site.
     Note: This is a demo pathway; tweak for your targets (bbox, state, etc.)
     """
     if not site_ids:
@@ -185,52 +198,47 @@ def fetch_usgs_latest_levels(site_ids: List[str]) -> List[Dict[str, Any]]:
         latest = pts[-1]
         val = latest.get("value")
         dt = latest.get("dateTime")
-        q = f"What is the latest groundwater level (depth to water) at USGS site {site}?"
-        a = f"The latest reported depth to water level is {val} (feet below land surface) as of {dt}."
-        items.append({"q": q, "a": a, "source": USGS_GWLEVELS_ENDPOINT, "meta": {"site": site, "paramCd": "72019"}})
+        items.append({"station": site, "value": val, "date": dt, "unit": "feet below land surface",
+                      "source": USGS_GWLEVELS_ENDPOINT, "origin": "USGS", "paramCd": "72019"})
     return items
 
-def fetch_datagov_india_levels(limit:int=2000) -> List[Dict[str, Any]]:
+def fetch_datagov_india_levels() -> List[Dict[str, Any]]:
     """
-    Example of pulling India groundwater levels via data.gov.in and templating to Q/A.
+    Latest India groundwater reading per station from the local data.gov.in store.
+    The store is filled offline (python datagov_ingest.py) or by start_datagov_ingest();
+    nothing is downloaded here.
     Requires:
       - env DATA_GOV_IN_API_KEY
       - env DATAGOV_GWL_RESOURCE_ID (dataset resource id)
     """
     if not (DATAGOV_API_KEY and DATAGOV_RESOURCE_ID):
         return []
-    items = []
-    # Paginate through records
-    page = 0
-    got = 0
-    while True:
-        params = {
-            "api-key": DATAGOV_API_KEY,
-            "format": "json",
-            "limit": min(1000, limit - got),
-            "offset": got
-        }
-        url = DATAGOV_ENDPOINT.format(resource_id=DATAGOV_RESOURCE_ID)
-        try:
-            js = _http_get(url, params=params).json()
-        except Exception:
-            break
-        records = js.get("records", [])
-        if not records:
-            break
-        for r in records:
-            # Try common field names; adapt to your resource schema
-            site = r.get("station_id") or r.get("well_id") or r.get("site") or r.get("location")
-            dt = r.get("date") or r.get("observation_date") or r.get("datetime") or r.get("month_year")
-            lvl = r.get("depth_m") or r.get("depth_mbgl") or r.get("water_level") or r.get("gwl_value")
-            if site and lvl:
-                q = f"What is the reported groundwater level at station {site}?"
-                a = f"The reported groundwater level is {lvl} (mbgl) on {dt}."
-                items.append({"q": q, "a": a, "source": url, "meta": {"station": site, "date": dt}})
-        got += len(records)
-        if got >= limit or len(records) == 0:
-            break
-    return items
+    url = DATAGOV_ENDPOINT.format(resource_id=DATAGOV_RESOURCE_ID)
+    return [{**r, "unit": "mbgl", "source": url, "origin": "DATAGOV_IN"}
+            for r in datagov_ingest.latest_per_station(DATAGOV_RESOURCE_ID)]
+
+def _run_datagov_ingest(limit: Optional[int]):
+    global _LEVELS
+    try:
+        stats = datagov_ingest.ingest(DATAGOV_API_KEY, DATAGOV_RESOURCE_ID, limit=limit)
+        # Fold the new readings into the live table (rebuilt and swapped, never edited in place)
+        _LEVELS = _build_levels(_LEVELS.rows() + fetch_datagov_india_levels())
+        _META_INGEST.update(stats, status="ok", error=None, finished_epoch=int(time.time()))
+    except Exception as e:
+        _META_INGEST.update(status="error", error=f"{type(e).__name__}: {e}", finished_epoch=int(time.time()))
+    finally:
+        _INGEST_LOCK.release()
+
+def start_datagov_ingest(limit: Optional[int] = None) -> bool:
+    """Start a full data.gov.in pull in a background thread. False if one is already running."""
+    if not (DATAGOV_API_KEY and DATAGOV_RESOURCE_ID):
+        raise ValueError("DATA_GOV_IN_API_KEY and DATAGOV_GWL_RESOURCE_ID must be set")
+    if not _INGEST_LOCK.acquire(blocking=False):
+        return False
+    _META_INGEST.clear()
+    _META_INGEST.update(status="running", started_epoch=int(time.time()), limit=limit)
+    threading.Thread(target=_run_datagov_ingest, args=(limit,), name="datagov-ingest", daemon=True).start()
+    return True
 
 # ---------------------------
 # Embeddings & search
@@ -243,31 +251,41 @@ def _load_model():
         _MODEL = SentenceTransformer("all-MiniLM-L6-v2")
     return _MODEL
 
+def _new_index():
+    kwargs = {"nprobe": FAQ_INDEX_NPROBE} if FAQ_INDEX_BACKEND == "ivf" else {}
+    return make_index(FAQ_INDEX_BACKEND, FAQ_INDEX_DTYPE, **kwargs)
+
 def build_index(rows: List[Dict[str, Any]]):
-    global _EMB
+    global _INDEX
     if not rows:
-        _EMB = None
+        _INDEX = None
         return
     model = _load_model()
     corpus = [r["q"] + " " + r["a"] for r in rows]
-    _EMB = model.encode(corpus, convert_to_tensor=False, normalize_embeddings=True)
+    emb = model.encode(corpus, convert_to_tensor=False, normalize_embeddings=True)
+    _INDEX = _new_index().build(emb)
 
 def _semantic_search(query: str, topk: int = 5) -> List[Tuple[int, float]]:
-    if _EMB is None or not _FAQ:
+    if _INDEX is None or not _FAQ:
         return []
     model = _load_model()
     qv = model.encode([query], convert_to_tensor=False, normalize_embeddings=True)[0]
     # cosine because vectors are normalized
-    sims = np.dot(_EMB, qv)
-    idxs = np.argsort(-sims)[:topk]
-    return [(int(i), float(sims[i])) for i in idxs]
+    return _INDEX.search(qv, topk=topk)
 
 # ---------------------------
 # Refresh pipeline
 # ---------------------------
 
+def _build_levels(rows: List[Dict[str, Any]]) -> LevelTable:
+    """A fresh station table; callers swap it in with one assignment so readers never see it half-built."""
+    table = LevelTable()
+    for r in rows:
+        table.upsert(**r)
+    return table
+
 def refresh_dataset() -> Dict[str, Any]:
-    global _FAQ, _META
+    global _FAQ, _META, _LEVELS
     collected: List[Dict[str, Any]] = []
 
     # 1) Static Q&A sources (big bulk, evergreen)
@@ -276,15 +294,14 @@ def refresh_dataset() -> Dict[str, Any]:
     collected.extend(cgwb)
     collected.extend(usgs)
 
-    # 2) Optional numeric → Q/A (you can disable by leaving envs blank)
+    # 2) Optional numeric readings → station table (you can disable by leaving envs blank)
     usgs_numeric = fetch_usgs_latest_levels(site_ids=[
         # demo site ids – replace with your targets
         "381744083110601", "325848082480901"
     ])
-    collected.extend(usgs_numeric)
+    datagov = fetch_datagov_india_levels()
 
-    datagov = fetch_datagov_india_levels(limit=2000)
-    collected.extend(datagov)
+    _LEVELS = _build_levels(usgs_numeric + datagov)
 
     # Clean & de-dup
     collected = _dedupe(collected)
@@ -300,11 +317,17 @@ def refresh_dataset() -> Dict[str, Any]:
             "DATAGOV_IN": len(datagov),
         },
         "using_datagov": bool(DATAGOV_API_KEY and DATAGOV_RESOURCE_ID),
+        "stations": len(_LEVELS),
     }
 
-    # Build vector index
+    # Build vector index (prose FAQs only)
     build_index(_FAQ)
-    return _META
+    _META["index"] = _INDEX.info() if _INDEX is not None else None
+    return _meta()
+
+def _meta() -> Dict[str, Any]:
+    # Ingest state changes in the background, so it is read at response time
+    return {**_META, "datagov_ingest": dict(_META_INGEST)}
 
 # ---------------------------
 # Routes
@@ -317,7 +340,7 @@ def get_faq():
     Tip: call /api/faq/refresh on startup or via a cron so this stays current.
     """
     return jsonify({
-        "meta": _META,
+        "meta": _meta(),
         "count": len(_FAQ),
         "data": _FAQ,
     })
@@ -332,6 +355,11 @@ def ask_faq():
     if not query:
         return jsonify({"a": "No question provided."}), 400
 
+    # Station level questions are answered straight from the readings table
+    hit = answer_level_question(_LEVELS, query)
+    if hit is not None:
+        return jsonify({"match": "station", "faq": hit})
+
     # First, quick keyword match (fast path)
     qlow = query.lower()
     for i, faq in enumerate(_FAQ):
@@ -351,6 +379,20 @@ def ask_faq():
     ]
     return jsonify({"match": "semantic", "faq": payload})
 
+@bp.route("/levels", methods=["GET"])
+def levels():
+    """
+    Latest reading per station. ?station=<id or name> returns just that station.
+    """
+    table = _LEVELS   # one snapshot even if a refresh swaps the table meanwhile
+    station = (request.args.get("station") or "").strip()
+    if station:
+        row = table.get(station)
+        if row is None:
+            return jsonify({"error": f"Unknown station {station}"}), 404
+        return jsonify(row)
+    return jsonify({"count": len(table), "data": table.rows()})
+
 @bp.route("/refresh", methods=["POST"])
 def refresh():
     """
@@ -359,6 +401,22 @@ def refresh():
     meta = refresh_dataset()
     return jsonify({"status": "ok", "meta": meta, "count": len(_FAQ)})
 
+@bp.route("/ingest", methods=["GET", "POST"])
+def ingest():
+    """
+    POST starts a background pull of the whole data.gov.in resource into the local store
+    (?limit= caps rows); GET reports its progress. /refresh only reads what is stored.
+    """
+    if request.method == "POST":
+        try:
+            started = start_datagov_ingest(request.args.get("limit", type=int))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not started:
+            return jsonify({"error": "ingest already running", "datagov_ingest": dict(_META_INGEST)}), 409
+        return jsonify({"status": "started", "datagov_ingest": dict(_META_INGEST)}), 202
+    return jsonify({"datagov_ingest": dict(_META_INGEST)})
+
 @bp.route("/sources", methods=["GET"])
 def sources():
     return jsonify({
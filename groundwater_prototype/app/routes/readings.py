@@ -1,11 +1,22 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
+import math
 import random
 import time
 
+import os
+import numpy as np
+import pandas as pd
+
+from telemetry import get_store, parse_body, FIELDS
+from anomaly import AnomalyDetector
+from districts import DATA_DIR
+
 bp = Blueprint("readings", __name__, url_prefix="/api/readings")
 
-@bp.route("/", methods=["GET"])
-def get_readings():
+# Live drawdown / sensor-fault detection over ingested water levels
+detector = AnomalyDetector()
+
+def _mock_readings():
     readings = []
     for i in range(10):
         readings.append({
@@ -14,4 +25,80 @@ def get_readings():
             "pressure": round(random.uniform(1.0, 2.0), 2),
             "temperature": round(random.uniform(20, 30), 2)
         })
-    return jsonify(readings)
+    return readings
+
+@bp.route("/", methods=["GET"])
+def get_readings():
+    """
+    Stored readings for ?station_id= (optionally ?since= / ?until= epoch seconds, ?limit=, latest first);
+    an empty list if nothing is stored for it. Without ?station_id= returns demo mock data.
+    """
+    station_id = request.args.get("station_id")
+    if station_id:
+        since = request.args.get("since", type=float)
+        until = request.args.get("until", type=float)
+        limit = request.args.get("limit", 100, type=int)
+        cols = get_store().read(station_id, since, until)
+        n = cols["timestamp"].shape[0]
+        readings = []
+        for i in range(n - 1, max(n - limit, 0) - 1, -1):
+            readings.append({f: (None if math.isnan(cols[f][i]) else float(cols[f][i])) for f in FIELDS})
+        return jsonify(readings)
+    return jsonify(_mock_readings())
+
+@bp.route("/ingest", methods=["POST"])
+def ingest():
+    """
+    Bulk ingest for well sensors. Body is CSV (text/csv), JSON lines (application/x-ndjson)
+    or a JSON array; many stations per batch. Valid rows are stored even if some are rejected.
+    """
+    try:
+        rows, errors = parse_body(request.get_data(), request.content_type)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"Could not parse body: {e}"}), 400
+    accepted = get_store().append(rows)
+    detector.update_many((r[0], r[1], r[2]) for r in rows)
+    status = 200 if accepted or not errors else 400
+    return jsonify({"accepted": accepted, "rejected": len(errors), "errors": errors[:20]}), status
+
+@bp.route("/stations", methods=["GET"])
+def stations():
+    """Stations with stored telemetry and their reading counts."""
+    return jsonify(get_store().stations())
+
+@bp.route("/anomalies", methods=["GET"])
+def anomalies():
+    """Recent alerts, newest first. ?station_id= filters, ?limit= caps (default 100)."""
+    station_id = request.args.get("station_id")
+    limit = request.args.get("limit", 100, type=int)
+    payload = {"alerts": detector.alerts(station_id, limit)}
+    if station_id:
+        payload["state"] = detector.state(station_id)
+    return jsonify(payload)
+
+def _histories():
+    """Full water-level history per station from readings.csv and the telemetry store."""
+    series = {}
+    path = os.path.join(DATA_DIR, "readings.csv")
+    if os.path.exists(path):
+        df = pd.read_csv(path, parse_dates=["timestamp"])
+        for sid, grp in df.groupby("station_id"):
+            ts = grp["timestamp"].astype("datetime64[s]").astype("int64").to_numpy(dtype=np.float64)
+            series[str(sid)] = (ts, grp["water_level_m"].to_numpy(dtype=np.float64))
+    store = get_store()
+    for sid in store.stations():
+        cols = store.read(sid)
+        if sid in series:
+            ts = np.concatenate([series[sid][0], cols["timestamp"]])
+            x = np.concatenate([series[sid][1], cols["water_level"]])
+            series[sid] = (ts, x)
+        else:
+            series[sid] = (cols["timestamp"], cols["water_level"])
+    return series
+
+@bp.route("/anomalies/backfill", methods=["POST"])
+def backfill_anomalies():
+    """Re-run detection over all stored history (vectorised) and reset live detector state from it."""
+    series = _histories()
+    found = detector.backfill(series)
+    return jsonify({"status": "ok", "stations": len(series), "alerts": found})
@@ -1,6 +1,8 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 import numpy as np
 
+from recommendation import groundwater_recommendation
+
 bp = Blueprint("recommend", __name__, url_prefix="/api/recommend")
 
 # Rule-based
@@ -27,3 +29,25 @@ def recommend_ml():
     labels = kmeans.labels_.tolist()
 
     return jsonify({"method": "kmeans", "labels": labels})
+
+# Rule-based, for districts without a well: water level comes from the interpolated surface
+@bp.route("/district/<state>/<district>", methods=["GET"])
+def recommend_district(state, district):
+    from routes.surface import district_estimate
+    try:
+        est = district_estimate(state, district)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 503
+    if est is None:
+        return jsonify({"error": f"No estimate for {district}, {state}"}), 404
+    if est["low_confidence"]:
+        # Too far from any well for the surface to say anything about this district
+        return jsonify({"error": f"No monitoring station near {district}, {state}",
+                        "nearest_station_km": est["nearest_station_km"]}), 404
+    rainfall = request.args.get("rainfall", 100, type=float)
+    usage_rate = request.args.get("usage_rate", 150, type=float)
+    result = groundwater_recommendation(est["water_level_m"], rainfall, usage_rate)
+    result["water_level_m"] = est["water_level_m"]
+    result["water_level_source"] = "interpolated"
+    result["nearest_station_km"] = est["nearest_station_km"]
+    return jsonify(result)
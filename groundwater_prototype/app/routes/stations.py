@@ -1,8 +1,10 @@
-import requests
+import os
 import time
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 import json
 
+import upstream
+
 bp = Blueprint("stations", __name__, url_prefix="/api/stations")
 
 # Load state-district mapping
@@ -20,71 +22,65 @@ START_DATE = "2000-11-01"
 END_DATE = "2024-11-01"
 
 
-def fetch_groundwater_data(state, district):
-    """Fetch all groundwater level records for a given state & district from India-WRIS API"""
-    page = 0
-    all_data = []
-
-    while True:
-        params = {
-            "stateName": state,
-            "districtName": district,
-            "agencyName": "CGWB",   # Central Ground Water Board
-            "startdate": START_DATE,
-            "enddate": END_DATE,
-            "download": "true",
-            "page": page,
-            "size": PAGE_SIZE
-        }
-
-        try:
-            # Use data instead of params
-            response = requests.post(BASE_URL, data=params, headers=HEADERS, timeout=30)
-            response.raise_for_status()
-
-            response_data = response.json()
-
-            # Extract data safely
-            if isinstance(response_data, dict):
-                data = response_data.get("data", [])
-            elif isinstance(response_data, list):
-                data = response_data
-            else:
-                data = []
-
-            # Stop if no more records
-            if not data:
-                break
-
-            all_data.extend(data)
-            print(f"{district}, {state} → Page {page} fetched {len(data)} records")
-            page += 1
-            time.sleep(1)  # avoid overloading server
-
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed for {district}, {state}: {e}")
-            break
-        except ValueError as e:
-            print(f"Invalid JSON for {district}, {state}: {e}")
-            break
-
+def fetch_groundwater_data(state, district, deadline=None):
+    """
+    Fetch all groundwater level records for a given state & district from India-WRIS API.
+    Every page call is bounded by `deadline` (upstream.Deadline) and the WRIS circuit breaker;
+    raises upstream.UpstreamError carrying the records fetched so far if it stops early.
+    """
+    params = {
+        "stateName": state,
+        "districtName": district,
+        "agencyName": "CGWB",   # Central Ground Water Board
+        "startdate": START_DATE,
+        "enddate": END_DATE,
+        "download": "true",
+    }
+    all_data = upstream.fetch_wris_pages(BASE_URL, params, HEADERS, PAGE_SIZE,
+                                         label=f"{district}, {state}", deadline=deadline)
     print(f"{district}, {state} → Total collected: {len(all_data)}")
     return all_data
 
 
+# Overall budget for one /api/stations/ sweep (seconds); override per call with ?budget=
+SWEEP_BUDGET_S = float(os.getenv("STATIONS_BUDGET_S", "120"))
+
+
 @bp.route("/", methods=["GET"])
 def get_all_stations():
-    """Fetch groundwater data for all states & districts in states_districts"""
+    """
+    Fetch groundwater data for all states & districts in states_districts within one deadline.
+    Districts that fail, time out or are skipped while the WRIS breaker is open are listed
+    under "missing"; whatever they returned before stopping is still included.
+    """
+    try:
+        budget = upstream.check_budget(request.args.get("budget", SWEEP_BUDGET_S, type=float))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    deadline = upstream.Deadline(budget)
+    started = time.monotonic()
     results = {}
+    missing = []
 
     for state, districts in states_districts.items():
         state_data = []
         for district in districts:
-            print(f"Fetching data for {district}, {state}...")
-            data = fetch_groundwater_data(state, district)
+            try:
+                data = fetch_groundwater_data(state, district, deadline=deadline)
+            except upstream.UpstreamError as e:
+                data = e.partial
+                missing.append({"state": state, "district": district, "reason": e.reason,
+                                "partial_records": len(e.partial), "detail": str(e)})
             state_data.extend(data)
 
         results[state] = state_data
         print(f" {state}: {len(state_data)} records added")
 
-    return jsonify(results)
+    return jsonify({
+        "data": results,
+        "complete": not missing,
+        "missing": missing,
+        "elapsed_s": round(time.monotonic() - started, 2),
+        "budget_s": budget,
+        "breakers": upstream.breaker_states(),
+    })
@@ -0,0 +1,57 @@
+from flask import Blueprint, jsonify, request
+import math
+
+from interpolation import engine, GRID_RES_DEG, MAX_STATION_KM
+from aggregation import district_key
+
+bp = Blueprint("surface", __name__, url_prefix="/api/surface")
+
+def _surface():
+    return engine.surface(request.args.get("date"), request.args.get("method", "idw"),
+                          request.args.get("res", GRID_RES_DEG, type=float))
+
+@bp.route("/grid", methods=["GET"])
+def grid():
+    """
+    Interpolated water level (m below ground) on the national grid.
+    ?date=YYYY-MM-DD (latest observations on or before), ?method=idw|kriging, ?res=degrees
+    """
+    try:
+        s = _surface()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    g = s["grid"]
+    return jsonify({
+        "date": s["date"], "method": s["method"], "res_deg": s["res_deg"], "stations": s["stations"],
+        "lat": [round(float(v), 4) for v in g["lat"]],
+        "lon": [round(float(v), 4) for v in g["lon"]],
+        "values": [[round(float(v), 3) for v in row] for row in g["values"]],
+    })
+
+@bp.route("/districts", methods=["GET"])
+def districts():
+    """Estimated water level at every district centroid, with distance to the nearest station."""
+    try:
+        s = _surface()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "date": s["date"], "method": s["method"], "stations": s["stations"], "recomputed": s["recomputed"],
+        "max_station_km": MAX_STATION_KM,
+        "districts": {k: {"water_level_m": round(v, 3), "nearest_station_km": round(s["nearest_station_km"][k], 1),
+                          "low_confidence": s["nearest_station_km"][k] > MAX_STATION_KM}
+                      for k, v in s["districts"].items() if not math.isnan(v)},
+    })
+
+def district_estimate(state, district):
+    """
+    Estimated water level for one district from the latest surface, as
+    {"water_level_m", "nearest_station_km", "low_confidence"}, or None if the district is unknown.
+    """
+    s = engine.surface()
+    key = district_key(state, district)
+    v = s["districts"].get(key)
+    if v is None or math.isnan(v):
+        return None
+    km = s["nearest_station_km"][key]
+    return {"water_level_m": round(v, 3), "nearest_station_km": round(km, 1), "low_confidence": km > MAX_STATION_KM}
@@ -0,0 +1,37 @@
+import os
+import re
+
+from flask import Blueprint, jsonify, send_from_directory, Response
+
+from tiles import TILES_DIR, current_manifest
+
+bp = Blueprint("tiles", __name__, url_prefix="/api/tiles")
+
+# Tile URLs are versioned by content hash, so browsers and proxies may keep them forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+EMPTY_TILE = '{"type":"FeatureCollection","features":[]}'
+
+@bp.route("/", methods=["GET"])
+def manifest():
+    """Current tile set version and URL template. Short cache: changes on every rebuild."""
+    m = current_manifest()
+    if m is None:
+        return jsonify({"error": "No tiles built. Run: python tiles.py <gadm40_IND_2.shp>"}), 404
+    m = dict(m)
+    m["url"] = f"/api/tiles/{m['version']}/{{z}}/{{x}}/{{y}}.geojson"
+    resp = jsonify(m)
+    resp.headers["Cache-Control"] = "public, max-age=60"
+    return resp
+
+@bp.route("/<version>/<int:z>/<int:x>/<int:y>.geojson", methods=["GET"])
+def tile(version, z, x, y):
+    if not re.fullmatch(r"[0-9a-f]{12}", version) or not os.path.isdir(os.path.join(TILES_DIR, version)):
+        return jsonify({"error": f"Unknown tile version {version}"}), 404
+    rel = os.path.join(version, str(z), str(x), f"{y}.geojson")
+    if not os.path.exists(os.path.join(TILES_DIR, rel)):
+        # Nothing in this tile (sea, outside India): still cacheable
+        resp = Response(EMPTY_TILE, mimetype="application/geo+json")
+    else:
+        resp = send_from_directory(TILES_DIR, rel, mimetype="application/geo+json")
+    resp.headers["Cache-Control"] = IMMUTABLE
+    return resp
@@ -0,0 +1,132 @@
+# station_levels.py
+from __future__ import annotations
+import re
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List
+
+# ---------------------------
+# Config
+# ---------------------------
+
+# Words that mark a question as asking for a numeric water level.
+LEVEL_WORDS = ("level", "depth", "water table", "reading", "mbgl", "how deep", "how far")
+
+# Longest station name (in words) we try to match inside a question.
+MAX_NAME_WORDS = 5
+
+# A purely numeric station id only matches right after one of these words,
+# unless it is at least MIN_BARE_NUMERIC digits long (so "last 12 years" is not station 12).
+STATION_CUES = ("station", "well", "site", "id", "no", "number")
+MIN_BARE_NUMERIC = 6
+
+_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%b-%Y", "%b %Y", "%m-%Y")
+
+# ---------------------------
+# Utilities
+# ---------------------------
+
+def normalize_station(name: Any) -> str:
+    # Same tokenizer as free-text lookup, so "Dhule (W)" is stored the way a question spells it
+    return " ".join(_tokens(str(name or "").replace("_", " ")))
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """
+    Best-effort parse of the date formats seen in USGS / data.gov.in records.
+    Returns naive UTC: values with an offset are converted, values without one are taken as UTC.
+    """
+    s = str(value or "").strip()
+    if not s:
+        return None
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+        return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return None
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+(?:[-./][a-z0-9]+)*", text.lower())
+
+# ---------------------------
+# Station → latest reading table
+# ---------------------------
+
+class LevelTable:
+    """
+    Keyed table of the latest groundwater reading per station.
+    Lookups are dict hits on the normalised station id/name.
+    """
+    def __init__(self):
+        self._rows: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def clear(self):
+        self._rows.clear()
+
+    def upsert(self, station: Any, value: Any, date: Any = None, unit: str = "", source: str = "",
+               **meta) -> bool:
+        """Insert a reading; keeps the newer one if the station already exists. Returns True if stored."""
+        key = normalize_station(station)
+        if not key or value in (None, ""):
+            return False
+        row = {"station": str(station), "value": value, "date": date, "unit": unit, "source": source, **meta}
+        cur = self._rows.get(key)
+        if cur is not None:
+            new_dt, cur_dt = parse_date(date), parse_date(cur.get("date"))
+            if new_dt and cur_dt and new_dt < cur_dt:
+                return False
+        self._rows[key] = row
+        return True
+
+    def get(self, station: Any) -> Optional[Dict[str, Any]]:
+        return self._rows.get(normalize_station(station))
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return list(self._rows.values())
+
+    def find_in_text(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a known station mentioned in free text: every 1..MAX_NAME_WORDS word
+        window is tried as a key, longest first. O(words) dict lookups.
+        """
+        toks = _tokens(text)
+        for width in range(min(MAX_NAME_WORDS, len(toks)), 0, -1):
+            for i in range(len(toks) - width + 1):
+                key = " ".join(toks[i:i + width])
+                row = self._rows.get(key)
+                if row is None:
+                    continue
+                if key.isdigit() and len(key) < MIN_BARE_NUMERIC and (i == 0 or toks[i - 1] not in STATION_CUES):
+                    continue
+                return row
+        return None
+
+# ---------------------------
+# Intent parser
+# ---------------------------
+
+def is_level_question(query: str) -> bool:
+    q = query.lower()
+    return any(w in q for w in LEVEL_WORDS)
+
+def answer_level_question(table: LevelTable, query: str) -> Optional[Dict[str, Any]]:
+    """
+    If the query asks for a water level at a station we hold, return the reading
+    with a templated answer; otherwise None so the caller falls back to the FAQ index.
+    """
+    if not len(table) or not is_level_question(query):
+        return None
+    row = table.find_in_text(query)
+    if row is None:
+        return None
+    unit = f" ({row['unit']})" if row.get("unit") else ""
+    a = f"The latest reported groundwater level at station {row['station']} is {row['value']}{unit}"
+    a += f" as of {row['date']}." if row.get("date") else "."
+    return {"q": query, "a": a, "source": row.get("source", ""), "reading": row}
@@ -0,0 +1,369 @@
+# telemetry.py
+from __future__ import annotations
+import os, io, re, csv, json, glob, time, atexit, hashlib, threading
+from array import array
+from datetime import timezone
+from typing import List, Dict, Optional, Tuple, Iterable
+
+import numpy as np
+
+from districts import DATA_DIR
+from station_levels import parse_date
+
+# ---------------------------
+# Config
+# ---------------------------
+
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", os.path.join(DATA_DIR, "telemetry"))
+FLUSH_ROWS = int(os.getenv("TELEMETRY_FLUSH_ROWS", "100000"))        # buffered rows before a flush
+FLUSH_INTERVAL_S = float(os.getenv("TELEMETRY_FLUSH_INTERVAL_S", "30"))
+FSYNC = os.getenv("TELEMETRY_FSYNC", "0") == "1"                    # fsync the WAL on every batch
+COMPACT_SEGMENTS = int(os.getenv("TELEMETRY_COMPACT_SEGMENTS", "8"))  # segments per station before merging
+
+MAX_STATION_ID = 64         # characters; longer ids are rejected per row
+
+# Columns kept per station, in WAL / CSV order after station_id
+FIELDS = ("timestamp", "water_level", "pressure", "temperature")
+
+# ---------------------------
+# Parsing
+# ---------------------------
+
+def _num(v) -> float:
+    if v is None or v == "":
+        return float("nan")
+    return float(v)
+
+def _ts(v) -> float:
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        dt = parse_date(v)
+        if dt is None:
+            raise ValueError(f"bad timestamp {v!r}")
+        return dt.replace(tzinfo=timezone.utc).timestamp()   # parse_date returns naive UTC
+
+def _row(station, ts, wl, pr, tp) -> Tuple[str, float, float, float, float]:
+    station = " ".join(str(station or "").replace(",", " ").split())
+    if not station:
+        raise ValueError("missing station_id")
+    if len(station) > MAX_STATION_ID:
+        raise ValueError(f"station_id longer than {MAX_STATION_ID} characters")
+    return station, _ts(ts), _num(wl), _num(pr), _num(tp)
+
+def parse_body(body: bytes, content_type: str) -> Tuple[List[Tuple], List[str]]:
+    """
+    Parse an ingest body into (rows, errors). Accepts
+      text/csv              header: station_id,timestamp,water_level,pressure,temperature
+      application/x-ndjson  one JSON object per line
+      application/json      a list of objects, or {"readings": [...]}
+    """
+    ct = (content_type or "").split(";")[0].strip().lower()
+    rows, errors = [], []
+    text = body.decode("utf-8")
+    if ct in ("text/csv", "application/csv"):
+        reader = csv.reader(io.StringIO(text))
+        header = [h.strip() for h in next(reader, [])]
+        try:
+            idx = [header.index(c) for c in ("station_id",) + FIELDS[:2]]
+        except ValueError:
+            return [], [f"CSV header must include station_id, timestamp, water_level; got {header}"]
+        opt = [header.index(c) if c in header else None for c in FIELDS[2:]]
+        for n, rec in enumerate(reader, start=2):
+            if not rec:
+                continue
+            try:
+                rows.append(_row(rec[idx[0]], rec[idx[1]], rec[idx[2]],
+                                 *(rec[i] if i is not None else None for i in opt)))
+            except (ValueError, IndexError) as e:
+                errors.append(f"line {n}: {e}")
+        return rows, errors
+    if ct in ("application/x-ndjson", "application/jsonl", "application/json-lines"):
+        objs: Iterable = (json.loads(ln) for ln in text.splitlines() if ln.strip())
+    elif ct == "application/json":
+        js = json.loads(text)
+        objs = js.get("readings", []) if isinstance(js, dict) else js
+        if not isinstance(objs, list):
+            raise ValueError("JSON body must be a list of readings or {\"readings\": [...]}")
+    else:
+        return [], [f"Unsupported content type {content_type!r}"]
+    for n, o in enumerate(objs, start=1):
+        try:
+            rows.append(_row(o.get("station_id"), o.get("timestamp"), o.get("water_level"),
+                             o.get("pressure"), o.get("temperature")))
+        except (ValueError, TypeError, AttributeError) as e:
+            errors.append(f"record {n}: {e}")
+    return rows, errors
+
+# ---------------------------
+# Store
+# ---------------------------
+
+def _safe(station: str) -> str:
+    """Directory name for a station: as-is when short and plain, otherwise a fixed-length hash."""
+    if len(station) <= MAX_STATION_ID and re.fullmatch(r"[A-Za-z0-9_.-]+", station):
+        return station
+    return "x" + hashlib.sha1(station.encode()).hexdigest()
+
+class TelemetryStore:
+    """
+    Append-only per-station column store.
+    Batches go to a write-ahead log first, then into in-memory array('d') columns;
+    every FLUSH_ROWS rows (or FLUSH_INTERVAL_S) the buffers are written out as one
+    .npz segment per station and the WAL generation is retired.
+    A segment named <gen>.npz holds WAL generations first_gen..gen; once a station has
+    more than COMPACT_SEGMENTS, its newest small segments are merged into the one being
+    written, so reads touch O(log rows) files.
+    """
+    def __init__(self, root: str = TELEMETRY_DIR, flush_rows: int = FLUSH_ROWS,
+                 flush_interval_s: float = FLUSH_INTERVAL_S, fsync: bool = FSYNC,
+                 compact_segments: int = COMPACT_SEGMENTS):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.fsync = fsync
+        self.compact_segments = max(2, compact_segments)
+        self._lock = threading.RLock()
+        self._buf: Dict[str, Dict[str, array]] = {}
+        self._buffered = 0
+        self._segments: Dict[str, List[str]] = {}
+        self._seg_rows: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+        self._latest: Dict[str, Tuple[float, float]] = {}   # station → (ts, water_level) of newest valid level
+        self._version = 0
+        self._last_flush = time.monotonic()
+        os.makedirs(root, exist_ok=True)
+        self._state_path = os.path.join(root, "state.json")
+        self._gen = self._load_state()
+        self._scan_segments()
+        self._replay()
+        self._wal = open(self._wal_path(self._gen), "a", encoding="utf-8")
+
+    # ---- persistence ----
+
+    def _wal_path(self, gen: int) -> str:
+        return os.path.join(self.root, f"wal-{gen:08d}.log")
+
+    def _load_state(self) -> int:
+        if os.path.exists(self._state_path):
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("flushed_gen", -1)) + 1
+        return 0
+
+    def _scan_segments(self):
+        found: Dict[str, List[Tuple[int, int, str, int]]] = {}
+        latest: Dict[str, Tuple[float, float]] = {}
+        for path in glob.glob(os.path.join(self.root, "*", "*.npz")):
+            gen = int(os.path.basename(path)[:8])
+            if path.endswith(".tmp.npz") or gen >= self._gen:
+                # Half-written, or from a flush that died before state.json moved on:
+                # its rows are still in the WAL and get replayed
+                os.remove(path)
+                continue
+            with np.load(path) as z:
+                station = str(z["station"])
+                first = int(z["first_gen"]) if "first_gen" in z.files else gen
+                n = z["timestamp"].shape[0]
+                self._note_latest(latest, station, z["timestamp"], z["water_level"])
+            found.setdefault(station, []).append((gen, first, path, n))
+        for station, segs in found.items():
+            kept: List[Tuple[int, int, str, int]] = []
+            for gen, first, path, n in sorted(segs, reverse=True):
+                if any(f <= gen <= g for g, f, _, _ in kept):
+                    os.remove(path)   # already merged into a newer segment; crash hit before it was removed
+                    continue
+                kept.append((gen, first, path, n))
+            self._segments[station] = [path for _, _, path, _ in reversed(kept)]
+            for _, _, path, n in kept:
+                self._seg_rows[path] = n
+            self._counts[station] = sum(n for *_, n in kept)
+        self._latest.update(latest)
+
+    @staticmethod
+    def _note_latest(latest: Dict[str, Tuple[float, float]], station: str, ts: np.ndarray, wl: np.ndarray):
+        ok = ~np.isnan(wl)
+        if ok.any():
+            i = int(np.argmax(np.where(ok, ts, -np.inf)))
+            if station not in latest or ts[i] >= latest[station][0]:
+                latest[station] = (float(ts[i]), float(wl[i]))
+
+    def _replay(self):
+        """Re-buffer readings from WAL generations that never made it into segments."""
+        for path in sorted(glob.glob(os.path.join(self.root, "wal-*.log"))):
+            gen = int(os.path.basename(path)[4:12])
+            if gen < self._gen:
+                os.remove(path)   # already flushed; crash happened before it was removed
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                rows = []
+                for ln in f:
+                    parts = ln.rstrip("\n").split(",")
+                    if ln.endswith("\n") and len(parts) == 5:   # a torn last line from a crash is skipped
+                        rows.append((parts[0], *map(float, parts[1:])))
+            self._buffer(rows)
+            self._gen = max(self._gen, gen)
+
+    def _buffer(self, rows: List[Tuple]):
+        for station, *vals in rows:
+            cols = self._buf.get(station)
+            if cols is None:
+                cols = self._buf[station] = {f: array("d") for f in FIELDS}
+            for f, v in zip(FIELDS, vals):
+                cols[f].append(v)
+            self._counts[station] = self._counts.get(station, 0) + 1
+            ts, wl = vals[0], vals[1]
+            if wl == wl:   # not NaN
+                cur = self._latest.get(station)
+                if cur is None or ts >= cur[0]:
+                    self._latest[station] = (ts, wl)
+        self._buffered += len(rows)
+        self._version += 1
+
+    # ---- writes ----
+
+    def append(self, rows: List[Tuple]) -> int:
+        """Durably append (station, ts, water_level, pressure, temperature) rows. Returns count."""
+        if not rows:
+            return 0
+        wal = "".join(f"{s},{t!r},{w!r},{p!r},{tp!r}\n" for s, t, w, p, tp in rows)
+        with self._lock:
+            self._wal.write(wal)
+            self._wal.flush()
+            if self.fsync:
+                os.fsync(self._wal.fileno())
+            self._buffer(rows)
+            if self._buffered >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval_s:
+                self.flush()
+        return len(rows)
+
+    def flush(self):
+        """Write buffered columns as segments, then retire the current WAL generation."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffered:
+                return
+            retired: List[str] = []
+            for station, cols in self._buf.items():
+                d = os.path.join(self.root, _safe(station))
+                os.makedirs(d, exist_ok=True)
+                path = os.path.join(d, f"{self._gen:08d}.npz")
+                tmp = path + ".tmp.npz"
+                segs = [p for p in self._segments.get(station, []) if p != path]
+                merge = self._to_merge(segs, len(cols["timestamp"]))
+                parts = [{f: np.frombuffer(cols[f], dtype=np.float64) for f in FIELDS}]
+                first = self._gen
+                if merge:
+                    parts = self._load(merge) + parts
+                    first = int(os.path.basename(merge[0])[:8])
+                    with np.load(merge[0]) as z:
+                        if "first_gen" in z.files:
+                            first = int(z["first_gen"])
+                data = {f: np.concatenate([p[f] for p in parts]) for f in FIELDS}
+                order = np.argsort(data["timestamp"], kind="stable")
+                np.savez(tmp, station=np.array(station), first_gen=np.array(first),
+                         **{f: v[order] for f, v in data.items()})
+                os.replace(tmp, path)
+                self._segments[station] = segs[:len(segs) - len(merge)] + [path]
+                self._seg_rows[path] = int(order.shape[0])
+                for p in merge:
+                    self._seg_rows.pop(p, None)
+                retired.extend(merge)
+            with open(self._state_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"flushed_gen": self._gen}, f)
+            os.replace(self._state_path + ".tmp", self._state_path)
+            for p in retired:
+                os.remove(p)
+            self._wal.close()
+            os.remove(self._wal_path(self._gen))
+            self._gen += 1
+            self._wal = open(self._wal_path(self._gen), "a", encoding="utf-8")
+            self._buf, self._buffered = {}, 0
+
+    def _to_merge(self, segs: List[str], new_rows: int) -> List[str]:
+        """
+        Newest segments to fold into the one being written. Only kicks in past
+        compact_segments; then keeps merging backwards until the next older segment is
+        over 4x the merged size (and enough were taken to get back to half the limit).
+        """
+        if len(segs) + 1 <= self.compact_segments:
+            return []
+        need = len(segs) + 1 - self.compact_segments // 2
+        take, total = 0, new_rows
+        for p in reversed(segs):
+            n = self._seg_rows.get(p, 0)
+            if take >= need and n > 4 * total:
+                break
+            take += 1
+            total += n
+        return segs[len(segs) - take:]
+
+    @staticmethod
+    def _load(paths: List[str]) -> List[Dict[str, np.ndarray]]:
+        parts = []
+        for p in paths:
+            with np.load(p) as z:
+                parts.append({f: z[f] for f in FIELDS})
+        return parts
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._wal.close()
+
+    # ---- reads ----
+
+    def stations(self) -> Dict[str, int]:
+        """Station → number of stored readings (flushed + buffered)."""
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def version(self) -> int:
+        """Bumped on every appended batch; cheap change detector for derived caches."""
+        return self._version
+
+    def latest(self) -> Dict[str, Tuple[float, float]]:
+        """Station → (timestamp, water_level) of its newest reading with a level, without touching segments."""
+        with self._lock:
+            return dict(self._latest)
+
+    def read(self, station: str, since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Columns for one station sorted by timestamp. Segments and the live buffer are
+        snapshotted under the lock, so a read never sees half of an ingest batch.
+        """
+        while True:
+            with self._lock:
+                paths = list(self._segments.get(station, []))
+                live = {f: np.array(c, dtype=np.float64) for f, c in self._buf.get(station, {}).items()}
+            try:
+                parts = self._load(paths)
+                break
+            except FileNotFoundError:
+                continue   # a flush merged these segments away meanwhile; take a fresh snapshot
+        if live:
+            parts.append(live)
+        if not parts:
+            return {f: np.empty(0) for f in FIELDS}
+        cols = {f: np.concatenate([p[f] for p in parts]) for f in FIELDS}
+        mask = np.ones(cols["timestamp"].shape[0], dtype=bool)
+        if since is not None:
+            mask &= cols["timestamp"] >= since
+        if until is not None:
+            mask &= cols["timestamp"] <= until
+        order = np.argsort(cols["timestamp"][mask], kind="stable")
+        return {f: v[mask][order] for f, v in cols.items()}
+
+_STORE: Optional[TelemetryStore] = None
+_STORE_LOCK = threading.Lock()
+
+def get_store() -> TelemetryStore:
+    """Process-wide store, opened (and WAL replayed) on first use."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = TelemetryStore()
+            atexit.register(_STORE.close)
+        return _STORE
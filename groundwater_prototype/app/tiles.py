@@ -0,0 +1,227 @@
+# tiles.py
+# Offline build of multi-resolution district boundary tiles for the map.
+#
+#   python tiles.py [path/to/gadm40_IND_2.shp]
+#
+# Writes data/tiles/<version>/<z>/<x>/<y>.geojson (web-mercator XYZ scheme) plus
+# data/tiles/current.json naming the latest version. Shared borders are simplified
+# once (as arcs between junctions) to ~1 pixel at each zoom, so neighbours stay
+# gap-free; districts are then clipped to the tile and rounded to the zoom's precision.
+from __future__ import annotations
+import os, re, json, math, shutil, hashlib
+from typing import Dict, Any, List, Tuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from districts import DATA_DIR
+
+# ---------------------------
+# Config
+# ---------------------------
+
+TILES_DIR = os.path.join(DATA_DIR, "tiles")
+DISTRICTS_SHP = os.path.join(DATA_DIR, "gadm40_IND_2.shp")
+SOIL_CLASS_CSV = os.path.join(DATA_DIR, "districts_with_soil.csv")
+SOIL_WEIGHTED_CSV = os.path.join(DATA_DIR, "district_soil_types_weighted.csv")
+MIN_ZOOM, MAX_ZOOM = 4, 10
+TILE_PX = 256
+
+# ---------------------------
+# Tile maths
+# ---------------------------
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) in degrees of XYZ tile z/x/y."""
+    n = 2 ** z
+    def lat(yy):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yy / n))))
+    return (x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y))
+
+def tile_of(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tolerance(z: int) -> float:
+    """Degrees covered by one pixel at zoom z (at the equator)."""
+    return 360.0 / (TILE_PX * 2 ** z)
+
+def _decimals(z: int) -> int:
+    return max(0, math.ceil(-math.log10(tolerance(z)))) + 1
+
+def _round(coords, nd: int):
+    if isinstance(coords[0], (int, float)):
+        return [round(c, nd) for c in coords]
+    return [_round(c, nd) for c in coords]
+
+# ---------------------------
+# Attributes
+# ---------------------------
+
+def _norm(s: Any) -> str:
+    s = str(s or "").lower().replace("&", "and")
+    return re.sub(r"[^a-z0-9]+", "", s)
+
+def district_attributes(engine=None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Per-district attributes keyed by normalised (state, district):
+    soil class, top-soil texture and, if an AggregationEngine is given, latest water level.
+    """
+    attrs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    if os.path.exists(SOIL_WEIGHTED_CSV):
+        for r in pd.read_csv(SOIL_WEIGHTED_CSV).itertuples(index=False):
+            attrs.setdefault((_norm(r.NAME_1), _norm(r.NAME_2)), {}).update({
+                "sand": None if pd.isna(r.SAND_TOP) else round(float(r.SAND_TOP), 1),
+                "clay": None if pd.isna(r.CLAY_TOP) else round(float(r.CLAY_TOP), 1),
+                "silt": None if pd.isna(r.SILT_TOP) else round(float(r.SILT_TOP), 1),
+            })
+    if os.path.exists(SOIL_CLASS_CSV):
+        for r in pd.read_csv(SOIL_CLASS_CSV).itertuples(index=False):
+            attrs.setdefault((_norm(r[0]), _norm(r[1])), {})["soil_type"] = r[2]
+    if engine is not None:
+        for key in engine.districts():
+            state, _, district = key.partition("|")
+            latest = engine.latest(key, "water_level")
+            if latest:
+                attrs.setdefault((_norm(state), _norm(district)), {}).update({
+                    "water_level_m": latest["value"], "water_level_date": latest["date"]})
+    return attrs
+
+# ---------------------------
+# Shared-border simplification
+# ---------------------------
+
+def shared_arcs(geoms: np.ndarray) -> np.ndarray:
+    """District boundaries noded and merged into arcs between junctions; a shared border is one arc."""
+    import shapely
+    from shapely.ops import linemerge
+    noded = shapely.union_all(shapely.boundary(geoms))
+    return shapely.get_parts(linemerge(noded))
+
+def simplify_shared(geoms: np.ndarray, arcs: np.ndarray, tol: float) -> List[Optional[Any]]:
+    """
+    Simplify every arc once (endpoints fixed), rebuild faces with polygonize and hand each
+    face back to the district containing it. Both sides of a border get the same line.
+    Districts that collapse below the tolerance come back as None.
+    """
+    import shapely
+    lines = shapely.union_all(shapely.simplify(arcs, tol, preserve_topology=True))   # re-node crossings
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(lines)))
+    out: List[Optional[Any]] = [None] * len(geoms)
+    if not len(faces):
+        return out
+    face_i, geom_i = shapely.STRtree(geoms).query(shapely.point_on_surface(faces), predicate="within")
+    owned: Dict[int, List[Any]] = {}
+    seen = set()
+    for f, g in zip(face_i, geom_i):
+        if f not in seen:   # a face belongs to one district; holes match none and are dropped
+            seen.add(f)
+            owned.setdefault(int(g), []).append(faces[f])
+    for g, parts in owned.items():
+        out[g] = parts[0] if len(parts) == 1 else shapely.union_all(parts)
+    return out
+
+def _polygonal(geom):
+    """Polygon/MultiPolygon part of a clip result; GeometryCollections keep only their polygons."""
+    from shapely import get_parts
+    from shapely.geometry import MultiPolygon
+    if geom is None or geom.is_empty:
+        return None
+    if geom.geom_type in ("Polygon", "MultiPolygon"):
+        return geom
+    polys = [p for g in get_parts(geom) for p in get_parts(g) if p.geom_type == "Polygon"]
+    if not polys:
+        return None
+    return polys[0] if len(polys) == 1 else MultiPolygon(polys)
+
+# ---------------------------
+# Build
+# ---------------------------
+
+def build_tiles(shp_path: str = DISTRICTS_SHP, out_dir: str = TILES_DIR,
+                min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM, engine=None) -> Dict[str, Any]:
+    """
+    Build the tile pyramid. Output goes to a content-hashed version directory so
+    tiles can be served with immutable caching; current.json is swapped last.
+    """
+    import geopandas as gpd
+    from shapely import clip_by_rect
+    from shapely.geometry import mapping
+
+    gdf = gpd.read_file(shp_path)
+    if gdf.crs is not None:
+        gdf = gdf.to_crs(4326)
+    attrs = district_attributes(engine)
+    props = []
+    for r in gdf.itertuples(index=False):
+        p = {"state": r.NAME_1, "district": r.NAME_2}
+        p.update(attrs.get((_norm(r.NAME_1), _norm(r.NAME_2)), {}))
+        props.append(p)
+
+    geoms = np.asarray(gdf.geometry.values, dtype=object)
+    arcs = shared_arcs(geoms)
+
+    staging = os.path.join(out_dir, "_staging")
+    shutil.rmtree(staging, ignore_errors=True)
+    digest = hashlib.sha1()
+    n_tiles = 0
+    for z in range(min_zoom, max_zoom + 1):
+        nd = _decimals(z)
+        simple = simplify_shared(geoms, arcs, tolerance(z))
+        tiles: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for geom, p in zip(simple, props):
+            if geom is None or geom.is_empty:
+                continue
+            w, s, e, n = geom.bounds
+            x0, y0 = tile_of(w, n, z)
+            x1, y1 = tile_of(e, s, z)
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    part = _polygonal(clip_by_rect(geom, *tile_bounds(z, x, y)))
+                    if part is None:
+                        continue
+                    g = mapping(part)
+                    tiles.setdefault((x, y), []).append(
+                        {"type": "Feature", "properties": p,
+                         "geometry": {"type": g["type"], "coordinates": _round(g["coordinates"], nd)}})
+        for (x, y), feats in sorted(tiles.items()):
+            body = json.dumps({"type": "FeatureCollection", "features": feats}, separators=(",", ":"))
+            path = os.path.join(staging, str(z), str(x), f"{y}.geojson")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(body)
+            digest.update(f"{z}/{x}/{y}".encode())
+            digest.update(body.encode())
+            n_tiles += 1
+
+    version = digest.hexdigest()[:12]
+    final = os.path.join(out_dir, version)
+    if os.path.isdir(final):
+        # Same content hash: clients may be fetching these immutable tiles right now, keep them
+        shutil.rmtree(staging)
+    else:
+        os.replace(staging, final)
+    manifest = {"version": version, "min_zoom": min_zoom, "max_zoom": max_zoom, "tiles": n_tiles,
+                "districts": len(gdf)}
+    tmp = os.path.join(out_dir, "current.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, "current.json"))
+    return manifest
+
+def current_manifest(out_dir: str = TILES_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(out_dir, "current.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    import sys
+    from aggregation import AggregationEngine, load_readings_csv
+    eng = AggregationEngine()
+    load_readings_csv(eng)
+    print(json.dumps(build_tiles(sys.argv[1] if len(sys.argv) > 1 else DISTRICTS_SHP, engine=eng), indent=2))
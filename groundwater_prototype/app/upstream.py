@@ -0,0 +1,217 @@
+# upstream.py
+from __future__ import annotations
+import os, math, time, threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+# ---------------------------
+# Config
+# ---------------------------
+
+PAGE_TIMEOUT = 30          # cap for any single upstream call (seconds)
+PAGE_PAUSE = 1.0           # politeness delay between pages (seconds)
+CHUNK_BYTES = 64 * 1024    # response body is read in chunks, checking the deadline in between
+CALL_WORKERS = int(os.getenv("UPSTREAM_CALL_WORKERS", "16"))
+BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))      # consecutive failures to open
+BREAKER_RESET_S = float(os.getenv("UPSTREAM_BREAKER_RESET_S", "60"))     # open → half-open after this long
+MAX_BUDGET_S = float(os.getenv("UPSTREAM_MAX_BUDGET_S", "300"))         # ceiling for a caller-supplied ?budget=
+
+# ---------------------------
+# Errors
+# ---------------------------
+
+class UpstreamError(Exception):
+    """An upstream fetch stopped early. `partial` holds whatever was collected before it failed."""
+    reason = "error"
+
+    def __init__(self, msg: str, partial: Optional[List[Any]] = None):
+        super().__init__(msg)
+        self.partial = partial or []
+
+class DeadlineExceeded(UpstreamError):
+    reason = "timeout"
+
+class CircuitOpen(UpstreamError):
+    reason = "circuit_open"
+
+# ---------------------------
+# Deadline
+# ---------------------------
+
+class Deadline:
+    """Absolute time budget for one incoming request, handed down to every upstream call."""
+    def __init__(self, seconds: Optional[float]):
+        self.expires = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return float("inf") if self.expires is None else self.expires - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float = PAGE_TIMEOUT) -> float:
+        """Timeout for the next call: the smaller of cap and what's left. Raises once the budget is spent."""
+        left = self.remaining()
+        if left <= 0:
+            raise DeadlineExceeded("deadline exceeded")
+        return min(cap, left)
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, min(seconds, self.remaining())))
+
+def check_budget(seconds: Optional[float]) -> float:
+    """Validate a caller-supplied budget: finite and > 0, clamped to MAX_BUDGET_S. Raises ValueError."""
+    if seconds is None or not math.isfinite(seconds) or seconds <= 0:
+        raise ValueError("budget must be a positive number of seconds")
+    return min(seconds, MAX_BUDGET_S)
+
+# ---------------------------
+# Circuit breaker
+# ---------------------------
+
+class CircuitBreaker:
+    """
+    Per-host breaker. Opens after `failures` consecutive errors and fails fast until
+    `reset_s` has passed; then one trial call is let through (half-open).
+    """
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_s: float = BREAKER_RESET_S):
+        self.failures = failures
+        self.reset_s = reset_s
+        self._count = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset_s else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_s or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def release(self):
+        with self._lock:
+            self._trial = False
+
+    def success(self):
+        with self._lock:
+            self._count, self._opened_at, self._trial = 0, None, False
+
+    def failure(self):
+        with self._lock:
+            self._count += 1
+            if self._trial or self._count >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+def breaker_for(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    with _BREAKERS_LOCK:
+        if host not in _BREAKERS:
+            _BREAKERS[host] = CircuitBreaker()
+        return _BREAKERS[host]
+
+def breaker_states() -> Dict[str, str]:
+    with _BREAKERS_LOCK:
+        return {host: b.state for host, b in _BREAKERS.items()}
+
+# ---------------------------
+# Calls
+# ---------------------------
+
+# Calls run here so the caller can stop waiting at the deadline even while a socket read blocks
+_CALLS = ThreadPoolExecutor(max_workers=CALL_WORKERS, thread_name_prefix="upstream")
+
+def _post_body(url: str, deadline: Deadline, timeout: float, kwargs: Dict[str, Any]) -> requests.Response:
+    """
+    requests' timeout bounds each socket read, not the call, so a host trickling bytes
+    could hold it open indefinitely; the body is streamed and the deadline checked per chunk.
+    """
+    with requests.post(url, timeout=timeout, stream=True, **kwargs) as response:
+        response.raise_for_status()
+        chunks = []
+        for chunk in response.iter_content(CHUNK_BYTES):
+            if deadline.expired:
+                raise DeadlineExceeded("deadline exceeded")
+            chunks.append(chunk)
+        response._content = b"".join(chunks)   # fully read, so .json() / .text work after close
+    return response
+
+def post(url: str, deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+    """requests.post guarded by the host's circuit breaker and bounded (wall clock) by the deadline."""
+    deadline = deadline or Deadline(None)
+    timeout = deadline.timeout()
+    breaker = breaker_for(url)
+    if not breaker.allow():
+        raise CircuitOpen(f"circuit open for {urlsplit(url).netloc}")
+    fut = _CALLS.submit(_post_body, url, deadline, timeout, kwargs)
+    try:
+        response = fut.result(timeout=None if deadline.expires is None else max(0.0, deadline.remaining()))
+    except (FutureTimeout, DeadlineExceeded):
+        # The worker gives up at its next chunk or socket timeout; the caller is released now
+        fut.cancel()
+        breaker.release()
+        raise DeadlineExceeded("deadline exceeded")
+    except requests.exceptions.RequestException:
+        if deadline.expired:
+            # Our own budget ran out; not the host's fault, so release any half-open trial only
+            breaker.release()
+            raise DeadlineExceeded("deadline exceeded")
+        breaker.failure()
+        raise
+    breaker.success()
+    return response
+
+def fetch_wris_pages(url: str, params: Dict[str, Any], headers: Dict[str, str], page_size: int,
+                     label: str = "", deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    """
+    Page through an India-WRIS dataset endpoint until an empty page.
+    Raises UpstreamError (with .partial) if a page fails, the breaker is open or the deadline runs out.
+    """
+    deadline = deadline or Deadline(None)
+    page = 0
+    all_data: List[Dict[str, Any]] = []
+    while True:
+        try:
+            response = post(url, deadline, data={**params, "page": page, "size": page_size}, headers=headers)
+            response_data = response.json()
+        except UpstreamError as e:
+            e.partial = all_data
+            raise
+        except requests.exceptions.RequestException as e:
+            raise UpstreamError(f"Request failed for {label}: {e}", all_data)
+        except ValueError as e:
+            raise UpstreamError(f"Invalid JSON for {label}: {e}", all_data)
+
+        # Extract data safely
+        if isinstance(response_data, dict):
+            data = response_data.get("data", [])
+        elif isinstance(response_data, list):
+            data = response_data
+        else:
+            data = []
+
+        # Stop if no more records
+        if not data:
+            break
+
+        all_data.extend(data)
+        page += 1
+        deadline.sleep(PAGE_PAUSE)  # avoid overloading server
+    return all_data
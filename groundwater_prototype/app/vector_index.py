@@ -0,0 +1,206 @@
+# vector_index.py
+from __future__ import annotations
+import math
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+# ---------------------------
+# Config
+# ---------------------------
+
+# Storage dtypes we can hold the corpus in. int8 keeps one float32 scale per row.
+# float16 only saves memory: numpy has no fp16 matmul, so every block is upcast and
+# scoring runs several times slower than float32. Use float32 (or int8) for speed.
+DTYPES = ("float32", "float16", "int8")
+
+# Rows scored per block so int8/float16 never get upcast for the whole corpus at once.
+SCORE_BLOCK = 8192
+
+# ---------------------------
+# Utilities
+# ---------------------------
+
+def _topk(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+    argpartition is O(n); only the k survivors get sorted.
+    """
+    n = scores.shape[0]
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+class _Store:
+    """
+    Row-major vector storage in float32, float16 or int8 (symmetric, per-row scale).
+    """
+    def __init__(self, vecs: np.ndarray, dtype: str = "float32"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}; expected one of {DTYPES}")
+        vecs = np.asarray(vecs, dtype=np.float32)
+        self.dtype = dtype
+        self.scale: Optional[np.ndarray] = None
+        if dtype == "int8":
+            amax = np.abs(vecs).max(axis=1) if len(vecs) else np.zeros(0, np.float32)
+            scale = np.where(amax > 0, amax / 127.0, 1.0).astype(np.float32)
+            self.data = np.clip(np.rint(vecs / scale[:, None]), -127, 127).astype(np.int8)
+            self.scale = scale
+        else:
+            self.data = vecs.astype(dtype, copy=False)
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def dot(self, qv: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Scores for query vector qv against all rows (or the given row ids), as float32.
+        """
+        data = self.data if rows is None else self.data[rows]
+        scale = self.scale if rows is None or self.scale is None else self.scale[rows]
+        out = np.empty(data.shape[0], dtype=np.float32)
+        for s in range(0, data.shape[0], SCORE_BLOCK):
+            blk = data[s:s + SCORE_BLOCK]
+            out[s:s + SCORE_BLOCK] = blk.astype(np.float32, copy=False) @ qv
+        if scale is not None:
+            out *= scale
+        return out
+
+# ---------------------------
+# Backends
+# ---------------------------
+
+class ExactIndex:
+    """
+    Brute-force inner-product search. Baseline for recall.
+    """
+    kind = "exact"
+
+    def __init__(self, dtype: str = "float32"):
+        self.dtype = dtype
+        self._store: Optional[_Store] = None
+
+    def build(self, vecs: np.ndarray) -> "ExactIndex":
+        self._store = _Store(vecs, self.dtype)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._store) if self._store is not None else 0
+
+    def search(self, qv: np.ndarray, topk: int = 5) -> List[Tuple[int, float]]:
+        if not len(self):
+            return []
+        qv = np.asarray(qv, dtype=np.float32)
+        sims = self._store.dot(qv)
+        idxs = _topk(sims, topk)
+        return [(int(i), float(sims[i])) for i in idxs]
+
+    def info(self) -> dict:
+        return {"kind": self.kind, "dtype": self.dtype, "size": len(self),
+                "bytes": self._store.nbytes if self._store is not None else 0}
+
+class IVFIndex:
+    """
+    Inverted-file ANN index: spherical k-means coarse quantiser, rows stored
+    grouped by cluster, and only the nprobe closest clusters are scanned per query.
+    """
+    kind = "ivf"
+
+    def __init__(self, dtype: str = "float32", nlist: Optional[int] = None,
+                 nprobe: int = 8, train_size: int = 20000, iters: int = 10, seed: int = 0):
+        self.dtype = dtype
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.iters = iters
+        self.seed = seed
+        self._store: Optional[_Store] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._ids: Optional[np.ndarray] = None      # position in store -> original row id
+        self._offsets: Optional[np.ndarray] = None  # cluster c lives in store[offsets[c]:offsets[c+1]]
+
+    def _assign(self, vecs: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        out = np.empty(vecs.shape[0], dtype=np.int64)
+        for s in range(0, vecs.shape[0], SCORE_BLOCK):
+            out[s:s + SCORE_BLOCK] = np.argmax(vecs[s:s + SCORE_BLOCK] @ centroids.T, axis=1)
+        return out
+
+    def _train(self, vecs: np.ndarray, nlist: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        n = vecs.shape[0]
+        sample = vecs[rng.choice(n, size=min(n, self.train_size), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(self.iters):
+            labels = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            empty = norms == 0
+            # Re-seed empty clusters from random sample rows
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = sums / np.maximum(norms, 1e-12)[:, None]
+        return centroids.astype(np.float32)
+
+    def build(self, vecs: np.ndarray) -> "IVFIndex":
+        vecs = np.asarray(vecs, dtype=np.float32)
+        n = vecs.shape[0]
+        if n == 0:
+            self._store, self._centroids = None, None
+            return self
+        nlist = self.nlist or max(1, int(4 * math.sqrt(n)))
+        nlist = min(nlist, n)
+        self._centroids = self._train(vecs, nlist)
+        labels = self._assign(vecs, self._centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=nlist)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._ids = order
+        self._store = _Store(vecs[order], self.dtype)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._store) if self._store is not None else 0
+
+    def search(self, qv: np.ndarray, topk: int = 5) -> List[Tuple[int, float]]:
+        if not len(self):
+            return []
+        qv = np.asarray(qv, dtype=np.float32)
+        probe = _topk(self._centroids @ qv, self.nprobe)
+        rows = np.concatenate([np.arange(self._offsets[c], self._offsets[c + 1]) for c in probe])
+        if rows.size == 0:
+            return []
+        sims = self._store.dot(qv, rows)
+        best = _topk(sims, topk)
+        return [(int(self._ids[rows[i]]), float(sims[i])) for i in best]
+
+    def info(self) -> dict:
+        return {"kind": self.kind, "dtype": self.dtype, "size": len(self),
+                "nlist": int(self._centroids.shape[0]) if self._centroids is not None else 0,
+                "nprobe": self.nprobe,
+                "bytes": self._store.nbytes if self._store is not None else 0}
+
+# ---------------------------
+# Factory
+# ---------------------------
+
+BACKENDS = {"exact": ExactIndex, "ivf": IVFIndex}
+
+def make_index(kind: str = "exact", dtype: str = "float32", **kwargs):
+    """
+    Create an (unbuilt) index. kind: 'exact' | 'ivf'; dtype: 'float32' | 'float16' | 'int8'.
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown index backend {kind!r}; expected one of {tuple(BACKENDS)}")
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype {dtype!r}; expected one of {DTYPES}")
+    return BACKENDS[kind](dtype=dtype, **kwargs)
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+import telemetry
+from telemetry import TelemetryStore
+
+# End-to-end throughput of /api/export/readings for each format, over a synthetic
+# national telemetry store (rows spread across many stations), including response streaming.
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=1000000)
+parser.add_argument("--stations", type=int, default=2000)
+args = parser.parse_args()
+
+root = tempfile.mkdtemp(prefix="export-bench-")
+store = TelemetryStore(root, flush_rows=500000, flush_interval_s=3600)
+rng = np.random.default_rng(0)
+per = args.rows // args.stations
+t0 = time.perf_counter()
+for s in range(args.stations):
+    ts = 1.7e9 + np.arange(per) * 3600.0
+    wl = rng.uniform(2, 60, per)
+    store.append([(f"W{s}", t, w, 1.5, 25.0) for t, w in zip(ts.tolist(), wl.tolist())])
+store.flush()
+telemetry._STORE = store
+print(f"seeded {per * args.stations} rows in {time.perf_counter() - t0:.1f}s")
+
+from app import app
+client = app.test_client()
+
+for fmt in ("csv", "arrow", "parquet"):
+    start = time.perf_counter()
+    resp = client.get(f"/api/export/readings?format={fmt}", buffered=False)
+    size = sum(len(chunk) for chunk in resp.response)
+    resp.close()
+    elapsed = time.perf_counter() - start
+    rows = per * args.stations
+    print(f"{fmt:<8} {size / 2**20:8.1f} MB in {elapsed:6.2f}s → {rows / elapsed:12,.0f} rows/s")
+
+store.close()
+shutil.rmtree(root)
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from vector_index import make_index
+
+# Recall-vs-latency benchmark for the FAQ vector index backends.
+# Uses synthetic clustered unit vectors shaped like all-MiniLM-L6-v2 output (384-d),
+# which is roughly what templated numeric Q/A rows look like: many near-duplicates.
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--n", type=int, default=200000)
+parser.add_argument("--dim", type=int, default=384)
+parser.add_argument("--queries", type=int, default=200)
+parser.add_argument("--topk", type=int, default=10)
+args = parser.parse_args()
+
+rng = np.random.default_rng(42)
+centers = rng.standard_normal((max(1, args.n // 200), args.dim)).astype(np.float32)
+corpus = centers[rng.integers(0, len(centers), args.n)] + 0.35 * rng.standard_normal((args.n, args.dim)).astype(np.float32)
+corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+queries = corpus[rng.choice(args.n, args.queries, replace=False)] + 0.1 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+def run(index):
+    t0 = time.perf_counter()
+    index.build(corpus)
+    build_s = time.perf_counter() - t0
+    hits = []
+    t0 = time.perf_counter()
+    for qv in queries:
+        hits.append([i for i, _ in index.search(qv, topk=args.topk)])
+    per_query_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    return hits, build_s, per_query_ms
+
+truth, build_s, ms = run(make_index("exact", "float32"))
+print(f"n={args.n} dim={args.dim} queries={args.queries} top{args.topk}")
+print(f"{'backend':<28}{'MB':>8}{'build s':>10}{'ms/query':>10}{'recall':>8}")
+print(f"{'exact/float32':<28}{corpus.nbytes / 2**20:>8.1f}{build_s:>10.2f}{ms:>10.2f}{1.0:>8.3f}")
+
+configs = [("exact", "float16", {}), ("exact", "int8", {})]
+configs += [("ivf", dtype, {"nprobe": p}) for dtype in ("float32", "int8") for p in (4, 8, 16, 32)]
+for kind, dtype, kw in configs:
+    index = make_index(kind, dtype, **kw)
+    hits, build_s, ms = run(index)
+    recall = np.mean([len(set(h) & set(t)) / len(t) for h, t in zip(hits, truth)])
+    label = f"{kind}/{dtype}" + (f" nprobe={kw['nprobe']}" if kw else "")
+    print(f"{label:<28}{index.info()['bytes'] / 2**20:>8.1f}{build_s:>10.2f}{ms:>10.2f}{recall:>8.3f}")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from telemetry import TelemetryStore, parse_body
+
+# Throughput of the bulk telemetry ingest path (parse + WAL + column buffers + flushes),
+# in readings/second, for CSV and JSON-lines batches spread over many stations.
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--batches", type=int, default=50)
+parser.add_argument("--batch-size", type=int, default=10000)
+parser.add_argument("--stations", type=int, default=500)
+parser.add_argument("--fsync", action="store_true")
+args = parser.parse_args()
+
+rng = random.Random(0)
+t0 = 1.7e9
+
+def csv_batch(b):
+    lines = ["station_id,timestamp,water_level,pressure,temperature"]
+    for i in range(args.batch_size):
+        lines.append(f"W{rng.randrange(args.stations)},{t0 + b * args.batch_size + i},"
+                     f"{rng.uniform(2, 60):.3f},{rng.uniform(1, 2):.3f},{rng.uniform(20, 30):.2f}")
+    return "\n".join(lines).encode()
+
+def ndjson_batch(b):
+    return "\n".join(
+        f'{{"station_id":"W{rng.randrange(args.stations)}","timestamp":{t0 + b * args.batch_size + i},'
+        f'"water_level":{rng.uniform(2, 60):.3f},"pressure":{rng.uniform(1, 2):.3f},"temperature":{rng.uniform(20, 30):.2f}}}'
+        for i in range(args.batch_size)).encode()
+
+for label, make, ctype in (("csv", csv_batch, "text/csv"), ("ndjson", ndjson_batch, "application/x-ndjson")):
+    bodies = [make(b) for b in range(args.batches)]
+    root = tempfile.mkdtemp(prefix="telemetry-bench-")
+    store = TelemetryStore(root, flush_rows=100000, flush_interval_s=3600, fsync=args.fsync)
+    start = time.perf_counter()
+    total = 0
+    for body in bodies:
+        rows, _ = parse_body(body, ctype)
+        total += store.append(rows)
+    store.flush()
+    elapsed = time.perf_counter() - start
+    read_start = time.perf_counter()
+    n_read = sum(store.read(f"W{s}")["timestamp"].shape[0] for s in range(args.stations))
+    read_s = time.perf_counter() - read_start
+    store.close()
+    print(f"{label:<7} {total} readings in {elapsed:.2f}s → {total / elapsed:,.0f} readings/s "
+          f"(read back {n_read} in {read_s:.2f}s)")
+    shutil.rmtree(root)